@@ -9,7 +9,9 @@ import ezcord
 from cogwatch import watch
 
 from database_handler import TaskOrcDB
+from state_backend import state_backend_from_env
 from trello_handler import TrelloHandler
+from trello_webhook import TrelloWebhookReceiver
 
 dotenv.load_dotenv()
 
@@ -20,15 +22,40 @@ class TaskOrc(ezcord.Bot):
             language="ch")
         self.add_help_command()
         self.load_cogs("cogs")
-        self.db = TaskOrcDB()
-        self.trello = TrelloHandler()
+        self.state = state_backend_from_env()
+        self.db = TaskOrcDB(state=self.state)
+        self.trello = TrelloHandler(state=self.state)
+        self.trello_webhooks = TrelloWebhookReceiver.from_env(self.trello, self.db)
+        self.reencrypt_task = None
         self.add_listener(self.on_events_forward, "on_message")
 
     @watch(path="cogs", preload=False, debug=True)
     async def on_ready(self):
         await self.db.setup()
+        # Move credentials to the primary key after a key rotation, without blocking startup.
+        if self.reencrypt_task is None:
+            self.reencrypt_task = asyncio.create_task(self.db.reencrypt_credentials())
+            self.reencrypt_task.add_done_callback(self._reencrypt_done)
+        if self.trello_webhooks:
+            await self.trello_webhooks.start()
         print("Bot ready.")
 
+    @staticmethod
+    def _reencrypt_done(task):
+        if task.cancelled(): return
+        if task.exception() is not None:
+            ezcord.log.error(f"Re-encrypting credentials failed: {task.exception()!r}")
+        elif task.result():
+            ezcord.log.info(f"Re-encrypted credentials of {task.result()} guilds")
+
+    async def close(self):
+        if self.trello_webhooks:
+            await self.trello_webhooks.stop()
+        await super().close()
+        await self.trello.close()
+        await self.db.close()
+        await self.state.close()
+
     async def on_events_forward(self, message):
         # Forward message from other robot
         if message.author.id == self.user.id or\
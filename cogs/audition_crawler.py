@@ -255,7 +255,6 @@ async def find_audition_info() -> Events:
 class AuditionCrawler(Cog):
     def __init__(self, bot: Bot):
         super().__init__(bot)
-        self.guild_already_send_title = {}  # {guild_id: [title, title, ...]}
         self.find_audition_info_task.start()
         self.events = Events()
 
@@ -293,13 +292,11 @@ class AuditionCrawler(Cog):
             channels = await guild.fetch_channels()
             for channel in channels:
                 if channel.name in ["task-orc", "robot-playground"]:
+                    # Titles already sent to the guild are kept in the bot's shared state backend.
+                    not_send_titles = await self.bot.state.add_to_set(
+                        f"audition_sent_titles:{guild.id}", *[event.title for event in events])
                     not_send_events = Events()
-                    if guild.id not in self.guild_already_send_title:
-                        self.guild_already_send_title[guild.id] = []
-                    for event in events:
-                        if event.title not in self.guild_already_send_title[guild.id]:
-                            self.guild_already_send_title[guild.id].append(event.title)
-                            not_send_events += [event]
+                    not_send_events += [event for event in events if event.title in not_send_titles]
                     if len(not_send_events) == 0: continue
                     embed = self._get_embed(not_send_events)
                     await channel.send(embed=embed)
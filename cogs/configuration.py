@@ -64,7 +64,7 @@ class Configuration(Cog):
             is_updated = await self.bot.db.set_trello_key_token(ctx.guild_id, key, token)
             if is_updated:
                 await emb.success(ctx, "Trello key and token updated.")
-                self.bot.trello.remove_client(ctx.guild_id)
+                await self.bot.trello.remove_client(ctx.guild_id)
             else:
                 await get_trello_instance(self, ctx)
                 await emb.success(ctx, "Trello key and token set.")
@@ -122,8 +122,7 @@ class Configuration(Cog):
         discord_name_to_trello_name_dict = dict(
             [(m, trello_id_to_name_dict.get(i) or "") for m, i in zip(member_list['name'], member_list['trello_id'])])
 
-        members_in_guild_to_be_assigned = dict(
-            [(m, i) for m, i in zip(member_list['name'], member_list['discord_id'])])
+        members_in_guild_to_be_assigned = member_list.to_dict("name", "discord_id")
 
         trello_id_to_name_dict["None"] = "None"
         is_set_callback = lambda discord_id, trello_id: self.bot.db.update_trello_id(ctx.guild_id, discord_id, trello_id)
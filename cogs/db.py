@@ -9,22 +9,23 @@ from discord import ApplicationContext
 from discord import Option
 from discord.commands import SlashCommandGroup
 from discord.commands import guild_only
+from discord.ext import tasks
 from discord.ext.commands import has_any_role
 from ezcord import Bot
 from ezcord import Cog
+from ezcord import log
 from ezcord.internal.dc import discord as dc
-from pandas import DataFrame as df
 from table2ascii import PresetStyle
 from table2ascii import table2ascii as t2a
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from constant_values import admin_roles
+from database_handler import MemberTable
 
 
-def df_to_ascii_table(df:df) -> str:
-    fields = ["name", "discord_id", "trello_id"]
-    body = [[df[f][i] for f in fields] for i in df.index]
+def members_to_ascii_table(members: MemberTable) -> str:
+    body = [[m.name, m.discord_id, m.trello_id] for m in members]
     fields = ["Name", "DiscordID", "TrelloID"]
 
     # Trim name length
@@ -43,9 +44,73 @@ def df_to_ascii_table(df:df) -> str:
     )
     return f"```\n{table}\n```"[:1024]
 
+def query_stats_to_ascii_table(summary: list) -> str:
+    max_length = 24
+    body = [[
+        r["method"] if len(r["method"]) <= max_length else r["method"][:max_length-2] + "..",
+        r["count"],
+        r["rows"],
+        f"{r['p50']:g}",
+        f"{r['p95']:g}",
+        f"{r['p99']:g}",
+    ] for r in summary]
+    table = t2a(
+        header = ["Method", "Calls", "Rows", "p50", "p95", "p99"],
+        body = body,
+        style = PresetStyle.simple,
+        column_widths = [max_length, 7, 8, 6, 6, 6],
+        cell_padding=0,
+    )
+    return f"```\n{table}\n```"
+
 class Database(Cog):
     def __init__(self, bot: Bot):
         super().__init__(bot)
+        bot.add_listener(self.on_member_join)
+        bot.add_listener(self.on_member_update)
+        bot.add_listener(self.on_user_update)
+        bot.add_listener(self.on_member_remove)
+        self.flush_member_changes_task.start()
+
+    def cog_unload(self):
+        self.flush_member_changes_task.cancel()
+
+    # Keep the Member table current between full rescans (/configure database guild_members).
+
+    async def on_member_join(self, member: dc.Member) -> None:
+        if member.bot: return
+        self.bot.db.queue_member_upsert(member.guild.id, member.id, member.display_name)
+
+    async def on_member_update(self, before: dc.Member, after: dc.Member) -> None:
+        if after.bot or before.display_name == after.display_name: return
+        self.bot.db.queue_member_upsert(after.guild.id, after.id, after.display_name)
+
+    async def on_user_update(self, before: dc.User, after: dc.User) -> None:
+        # Global name changes show up in every guild where the member has no nickname.
+        if after.bot: return
+        for guild in after.mutual_guilds:
+            member = guild.get_member(after.id)
+            if member is not None:
+                self.bot.db.queue_member_upsert(guild.id, member.id, member.display_name)
+
+    async def on_member_remove(self, member: dc.Member) -> None:
+        if member.bot: return
+        self.bot.db.queue_member_removal(member.guild.id, member.id)
+
+    @tasks.loop(seconds=5.0)
+    async def flush_member_changes_task(self):
+        try:
+            await self.bot.db.flush_member_changes()
+        except Exception as e:
+            log.warning(f"Failed to flush member changes, retrying later: {e}")
+
+    @flush_member_changes_task.before_loop
+    async def before_flush_member_changes_task(self):
+        await self.bot.wait_until_ready()
+
+    @flush_member_changes_task.after_loop
+    async def after_flush_member_changes_task(self):
+        await self.bot.db.flush_member_changes()
 
     db_cmd = SlashCommandGroup("db", "db operations")
     getters = db_cmd.create_subgroup("get", "getters")
@@ -58,10 +123,27 @@ class Database(Cog):
     async def members(self, ctx: ApplicationContext) -> None:
         await self._get_members(ctx, f"{ctx.guild} 的成員們")
 
+    @db_cmd.command(
+        name="stats", description="Show database call counts and latency percentiles (ms).",
+    )
+    @guild_only()
+    @has_any_role(*admin_roles)
+    async def stats(self, ctx: ApplicationContext) -> None:
+        summary = self.bot.db.query_stats.summary()
+        if not summary:
+            await ctx.respond("No database calls recorded yet.")
+            return
+        # Stay within Discord's 2000 character message limit.
+        table = query_stats_to_ascii_table(summary)
+        while len(table) > 1900 and len(summary) > 1:
+            summary = summary[:-1]
+            table = query_stats_to_ascii_table(summary)
+        await ctx.respond(f"**Database latency (ms)**\n{table}")
+
     async def _get_members(self, ctx: ApplicationContext, title: str) -> None:
         member_list = await self.bot.db.get_member_data(ctx.guild_id)
         title = title if title else f"{ctx.guild} 的成員們"
-        await ctx.respond(f"**{title}**\n{df_to_ascii_table(member_list)}")
+        await ctx.respond(f"**{title}**\n{members_to_ascii_table(member_list)}")
 
 
 
@@ -1,3 +1,4 @@
+import asyncio
 import datetime
 import json
 import math
@@ -12,6 +13,7 @@ from typing import List
 from typing import Optional
 from typing import Union
 
+import aiohttp
 import discord
 import numpy as np
 
@@ -27,11 +29,11 @@ from discord.ext.pages import Paginator
 from ezcord import Bot
 from ezcord import Cog
 from ezcord import emb
+from ezcord import log
 from ezcord.internal.dc import discord as dc
 from table2ascii import Merge
 from table2ascii import PresetStyle
 from table2ascii import table2ascii as t2a
-from trello import TrelloClient
 from wcwidth import wcswidth
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -45,6 +47,8 @@ from trello_handler import get_trello_instance
 from trello_handler import DateCard
 from trello_handler import FilteredCards
 from trello_handler import TrelloDummyAssign
+from trello_handler import TrelloHandler
+from trello_client import ResourceUnavailable
 from utils import task_parser
 
 
@@ -83,7 +87,7 @@ class Trello(Cog):
         trello = await get_trello_instance(self, ctx)
         if trello is None: return
 
-        all_boards = trello.list_boards()
+        all_boards = await trello.list_boards(fields=TrelloHandler.BOARD_SUMMARY_FIELDS)
         embed = dc.Embed(
             title = "Trello上的看板:",
             color=dc.Colour.fuchsia()
@@ -133,24 +137,56 @@ class Trello(Cog):
         trello_id = await self.bot.db.get_trello_id_from_discord_id(ctx.guild_id, discord_id)
         trello_settings = await self.bot.db.get_trello_settings(ctx.guild_id)
         list_name_not_to_trace = trello_settings.list_name_not_to_trace
-        filtered_cards = await self.bot.trello.get_undone(trello, trello_id, list_name_not_to_trace)
-        if filtered_cards:
-            embed = self.get_embed_from_filtered_cards(
-                title="Trello上的未完成卡片:",
-                filtered_cards=filtered_cards,
-                trello_id_to_discord_name=trello_id_to_discord_name)
-            try:
-                if user == "me" and trello_id:
-                    embed.add_field(
-                        name="",
-                        value=f"[»»»»»»»»»»»»»»](https://trello.com/u/{trello_id}/cards)",
-                        inline=False)
-            except discord.errors.ExtensionFailed:
-                pass
-            await ctx.followup.send(embed=embed)
+
+        # Answer from the local card mirror, falling back to a live paged search.
+        pages = None
+        try:
+            filtered_cards = await self.bot.trello.get_mirrored_undone(
+                trello, self.bot.db, trello_id, list_name_not_to_trace)
+        except (ResourceUnavailable, aiohttp.ClientError, asyncio.TimeoutError) as e:
+            log.warning(f"Card mirror sync failed, searching Trello instead: {e}")
+            filtered_cards = FilteredCards()
+            pages = self.bot.trello.iter_undone(trello, trello_id, list_name_not_to_trace)
+
+        sent_msg = None
+        if pages is None:
+            if filtered_cards:
+                sent_msg = await ctx.followup.send(embed=self._get_undone_embed(
+                    filtered_cards, trello_id_to_discord_name, user, trello_id))
         else:
+            # Render as soon as the first page arrives and refresh with each later page.
+            async for page in pages:
+                for card in page:
+                    filtered_cards.plain_append(card)
+                embed = self._get_undone_embed(
+                    filtered_cards, trello_id_to_discord_name, user, trello_id)
+                if sent_msg is None:
+                    sent_msg = await ctx.followup.send(embed=embed)
+                else:
+                    await sent_msg.edit(embed=embed)
+        if sent_msg is None:
             await ctx.followup.send("No undone cards found.")
 
+    def _get_undone_embed(
+            self,
+            filtered_cards: FilteredCards,
+            trello_id_to_discord_name: Dict[str, str],
+            user: str,
+            trello_id: Optional[str]) -> dc.Embed:
+        embed = self.get_embed_from_filtered_cards(
+            title="Trello上的未完成卡片:",
+            filtered_cards=filtered_cards,
+            trello_id_to_discord_name=trello_id_to_discord_name)
+        try:
+            if user == "me" and trello_id:
+                embed.add_field(
+                    name="",
+                    value=f"[»»»»»»»»»»»»»»](https://trello.com/u/{trello_id}/cards)",
+                    inline=False)
+        except discord.errors.ExtensionFailed:
+            pass
+        return embed
+
     def get_embed_from_filtered_cards(
             self,
             title: str,
@@ -0,0 +1,89 @@
+import base64
+import os
+
+from collections import OrderedDict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from cryptography.fernet import Fernet
+from cryptography.fernet import InvalidToken
+from cryptography.fernet import MultiFernet
+
+
+class CredentialVault:
+    """Encrypts stored credentials and caches the decrypted ones per guild.
+
+    ``keys`` are base64-encoded Fernet keys, primary first. New values are
+    always encrypted with the primary key; older keys are only used to
+    decrypt until :meth:`rotate` has re-encrypted everything.
+    """
+
+    def __init__(self, keys: List[str], max_cached: int = 256) -> None:
+        if not keys:
+            raise ValueError("No encryption key found. Please run `python encrypt.py -g` to generate a key")
+        self.keys = keys
+        self.max_cached = max_cached
+        self._fernets = [Fernet(base64.b64decode(k)) for k in keys]
+        self._cipher = MultiFernet(self._fernets)
+        self._credentials: "OrderedDict[str, Tuple[str, str]]" = OrderedDict()
+
+    @classmethod
+    def from_env(cls, max_cached: int = 256) -> "CredentialVault":
+        """Build from ``ENCRYPT_KEY``, a comma-separated list of keys, primary first."""
+        keys = [k.strip() for k in os.environ.get("ENCRYPT_KEY", "").split(",") if k.strip()]
+        return cls(keys, max_cached=max_cached)
+
+    @property
+    def can_rotate(self) -> bool:
+        return len(self._fernets) > 1
+
+    def encrypt(self, plain_text: str) -> str:
+        return base64.b64encode(self._cipher.encrypt(plain_text.encode())).decode()
+
+    def decrypt(self, cipher_text: str) -> str:
+        return self._cipher.decrypt(base64.b64decode(cipher_text)).decode()
+
+    def needs_rotation(self, cipher_text: str) -> bool:
+        """Whether the value was encrypted with a key other than the primary one."""
+        try:
+            self._fernets[0].decrypt(base64.b64decode(cipher_text))
+        except InvalidToken:
+            return True
+        return False
+
+    def rotate(self, cipher_text: str) -> str:
+        """Re-encrypt a value with the primary key."""
+        return base64.b64encode(self._cipher.rotate(base64.b64decode(cipher_text))).decode()
+
+    # Decrypted credential cache
+
+    def get_credentials(self, guild_id: Union[str, int]) -> Optional[Tuple[str, str]]:
+        credentials = self._credentials.get(str(guild_id))
+        if credentials is not None:
+            self._credentials.move_to_end(str(guild_id))
+        return credentials
+
+    def put_credentials(self, guild_id: Union[str, int], key: str, token: str) -> None:
+        self._credentials[str(guild_id)] = (key, token)
+        self._credentials.move_to_end(str(guild_id))
+        while len(self._credentials) > self.max_cached:
+            self._credentials.popitem(last=False)
+
+    def forget_credentials(self, guild_id: Union[str, int]) -> None:
+        self._credentials.pop(str(guild_id), None)
+
+
+_default_vault: Optional[CredentialVault] = None
+_default_vault_env: Optional[str] = None
+
+
+def default_vault() -> CredentialVault:
+    """The process-wide vault, rebuilt only when ``ENCRYPT_KEY`` changes."""
+    global _default_vault, _default_vault_env
+    env = os.environ.get("ENCRYPT_KEY")
+    if _default_vault is None or env != _default_vault_env:
+        _default_vault = CredentialVault.from_env()
+        _default_vault_env = env
+    return _default_vault
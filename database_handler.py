@@ -1,26 +1,107 @@
+import asyncio
+import functools
 import json
-import pandas as pd
 import sqlite3
+import time
 
+from typing import Any
 from typing import Dict
+from typing import Iterator
 from typing import List
 from typing import Optional
 from typing import Tuple
 from typing import Union
 
 from discord import ApplicationContext
-from encryption import decrypt
-from encryption import encrypt
+from credential_vault import default_vault
+from db_pool import PooledConnection
+from db_pool import QueryStats
+from db_pool import SQLitePool
+from state_backend import MemoryStateBackend
+from state_backend import StateBackend
 from ezcord.sql import DBHandler
 
 class MemberData:
-    def __init__(self, guild_id: str, name: str, discord_id: str, trello_id: Optional[str] = "") -> None:
+    __slots__ = ("guild_id", "name", "discord_id", "trello_id", "id")
+
+    def __init__(
+            self,
+            guild_id: str,
+            name: str,
+            discord_id: str,
+            trello_id: Optional[str] = "",
+            id: Optional[int] = None) -> None:
         self.guild_id = guild_id
         self.name = name
         self.discord_id = discord_id
         self.trello_id = trello_id
+        self.id = id
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "MemberData":
+        # Rows come as (id, guild_id, name, discord_id, trello_id)
+        return cls(row[1], row[2], row[3], row[4], id=row[0])
+
+class MemberTable:
+    """Member rows of one guild with column access, e.g. ``table["name"]``."""
+    __slots__ = ("rows",)
+    columns = ("id", "guild_id", "name", "discord_id", "trello_id")
+
+    def __init__(self, rows: List[MemberData]) -> None:
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[MemberData]:
+        return iter(self.rows)
+
+    def __getitem__(self, column: str) -> List[Any]:
+        if column not in self.columns:
+            raise KeyError(column)
+        return [getattr(row, column) for row in self.rows]
+
+    def to_dict(self, key: str, value: str) -> Dict[Any, Any]:
+        """Map one column to another, e.g. ``to_dict("name", "trello_id")``."""
+        return dict(zip(self[key], self[value]))
+
+    def to_pandas(self):
+        import pandas as pd
+        return pd.DataFrame([[getattr(row, c) for c in self.columns] for row in self.rows], columns=self.columns)
+
+class MirroredCard:
+    """An open Trello card as stored in the local card mirror."""
+
+    def __init__(
+            self,
+            card_id: str,
+            board_id: str,
+            list_id: str,
+            name: str,
+            due: Optional[str],
+            due_complete: bool,
+            labels: List[str],
+            short_url: str,
+            members: List[str]) -> None:
+        self.card_id = card_id
+        self.board_id = board_id
+        self.list_id = list_id
+        self.name = name
+        self.due = due
+        self.due_complete = due_complete
+        self.labels = labels
+        self.short_url = short_url
+        self.members = members
+
+    @classmethod
+    def from_row(cls, row: tuple) -> "MirroredCard":
+        return cls(
+            row[0], row[1], row[2], row[3], row[4], bool(row[5]),
+            row[6].split(",") if row[6] else [], row[7],
+            row[8].split(",") if row[8] else [])
 
 def error_handler(func):
+    @functools.wraps(func)
     async def wrapper(*args, **kwargs):
         try:
             return await func(*args, **kwargs)
@@ -32,29 +113,49 @@ def error_handler(func):
             return None
     return wrapper
 
+def _count_rows(result) -> int:
+    # Only lists and mappings of rows count; scalars, credential pairs and settings don't.
+    if isinstance(result, (list, dict, MemberTable)):
+        return len(result)
+    return 0
+
+def instrumented(func):
+    """Record call count, returned rows and latency of a TaskOrcDB method in ``self.query_stats``."""
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        started = time.perf_counter()
+        result = None
+        try:
+            result = await func(self, *args, **kwargs)
+            return result
+        finally:
+            self.query_stats.record(
+                func.__name__, (time.perf_counter() - started) * 1000, _count_rows(result))
+    return wrapper
+
 class TrelloSettings:
     def __init__(
             self,
-            trello_no_trace_list_name: List[Tuple[str]],
-            board_id_list_id_to_create_card: List[Tuple[str]],
+            list_name_not_to_trace: List[str],
+            board_id_list_id_to_create_card: Dict[str, str],
             board_keywords: Dict[str, str]) -> None:
-        self.list_name_not_to_trace = []  # [ListName, ]
-        self.board_id_list_id_to_create_card = {}  # {BoardID: ListID}
-        self.board_keywords = {}  # {BoardID: "kw1,kw2, ..."}
+        self.list_name_not_to_trace = list(list_name_not_to_trace)  # [ListName, ]
+        self.board_id_list_id_to_create_card = dict(board_id_list_id_to_create_card)  # {BoardID: ListID}
+        self.board_keywords = dict(board_keywords)  # {BoardID: "kw1,kw2, ..."}
         self.default_board = ""
-        for row in trello_no_trace_list_name:
-            if row[1] == "trello_no_trace_list_name":
-                self.list_name_not_to_trace.append(row[2])
-        for row in board_id_list_id_to_create_card:
-            if row[1] == "board_id_list_id_to_create_card":
-                self.board_id_list_id_to_create_card[row[2]] = row[3]
-        for row in board_keywords:
-            if row[1] == "board_keywords":
-                self.board_keywords[row[2]] = row[3]
-                if row[3] == "":
-                    self.default_board = row[2]
-            if self.default_board == "":
-                self.default_board = list(self.board_keywords.keys())[0]
+        # The last board without keywords, otherwise the first board.
+        for bid, keywords in self.board_keywords.items():
+            if keywords == "":
+                self.default_board = bid
+        if self.default_board == "" and self.board_keywords:
+            self.default_board = next(iter(self.board_keywords))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "list_name_not_to_trace": self.list_name_not_to_trace,
+            "board_id_list_id_to_create_card": self.board_id_list_id_to_create_card,
+            "board_keywords": self.board_keywords,
+        }
 
     def __str__(self) -> str:
         return "<TrelloSettings>\n"\
@@ -67,24 +168,120 @@ class TrelloSettings:
 
 
 class TaskOrcDB(DBHandler):
+    # Existing members only get their name refreshed; their Trello ID is kept.
+    UPSERT_MEMBER_SQL = "INSERT INTO Member (guild_id, name, discord_id, trello_id) VALUES (?, ?, ?, ?) "\
+        "ON CONFLICT (guild_id, discord_id) DO UPDATE SET name = excluded.name"
+
+    def __init__(self, pool_size: int = 4, state: Optional[StateBackend] = None) -> None:
+        """Initialize the database handler.
 
-    def __init__(self) -> None:
-        """Initialize the database handler."""
+        ``state`` holds the settings cache; share a Redis backend between
+        shard processes so they see each other's writes.
+        """
         super().__init__("taskorc.db")
+        self.pool = SQLitePool(self.DB, size=pool_size)
+        self.state = state or MemoryStateBackend()
+        self.query_stats = QueryStats()
+        self._pending_members = {}  # {(guild_id, discord_id): name, or None to remove}
         # self.member_data = {}  # {"guild_id": [MemberData, ]}
 
+    def start(self, immediate: bool = False) -> PooledConnection:
+        """Check out a pooled connection; the block runs as one transaction.
+
+        Use ``immediate=True`` when the block writes based on what it read.
+        """
+        return self.pool.connection(immediate)
+
+    async def close(self) -> None:
+        await self.flush_member_changes()
+        await self.pool.close()
+
+    @instrumented
     async def setup(self) -> None:
         """Set up the database schema."""
-        async with self.start() as db:
+        async with self.start(immediate=True) as db:
             await db.exec(
                 "CREATE TABLE IF NOT EXISTS Member "\
                 "(id INTEGER PRIMARY KEY, guild_id TEXT, name TEXT, discord_id TEXT, trello_id TEXT)")
             await db.exec(
-                "CREATE TABLE IF NOT EXISTS TrelloData"\
-                "(guild_id TEXT, item TEXT, value TEXT, value2 TEXT)")
+                "CREATE TABLE IF NOT EXISTS GuildCredentials "\
+                "(guild_id TEXT PRIMARY KEY, key TEXT, token TEXT)")
+            await db.exec(
+                "CREATE TABLE IF NOT EXISTS UntrackedList "\
+                "(guild_id TEXT, list_name TEXT, PRIMARY KEY (guild_id, list_name))")
+            await db.exec(
+                "CREATE TABLE IF NOT EXISTS BoardEntryList "\
+                "(guild_id TEXT, board_id TEXT, list_id TEXT, PRIMARY KEY (guild_id, board_id))")
+            await db.exec(
+                "CREATE TABLE IF NOT EXISTS BoardKeywords "\
+                "(guild_id TEXT, board_id TEXT, keywords TEXT, PRIMARY KEY (guild_id, board_id))")
+            # Migrate before creating the card mirror, which a migration may drop to rebuild.
+            await self._migrate(db)
+            await db.exec(
+                "CREATE TABLE IF NOT EXISTS TrelloCard "\
+                "(card_id TEXT, guild_id TEXT, board_id TEXT, list_id TEXT, name TEXT, "\
+                "due TEXT, due_complete INTEGER, labels TEXT, short_url TEXT, PRIMARY KEY (guild_id, card_id))")
+            await db.exec(
+                "CREATE INDEX IF NOT EXISTS TrelloCard_guild_due ON TrelloCard (guild_id, due)")
+            await db.exec(
+                "CREATE INDEX IF NOT EXISTS TrelloCard_guild_board ON TrelloCard (guild_id, board_id)")
+            await db.exec(
+                "CREATE TABLE IF NOT EXISTS TrelloCardMember "\
+                "(card_id TEXT, guild_id TEXT, member_id TEXT, PRIMARY KEY (guild_id, card_id, member_id))")
+            await db.exec(
+                "CREATE INDEX IF NOT EXISTS TrelloCardMember_guild_member ON TrelloCardMember (guild_id, member_id)")
+            await db.exec(
+                "CREATE TABLE IF NOT EXISTS TrelloCardSync "\
+                "(guild_id TEXT, board_id TEXT, last_sync TEXT, PRIMARY KEY (guild_id, board_id))")
+
+    async def _migrate(self, db: PooledConnection) -> None:
+        """Bring databases created by older versions up to the current schema."""
+        version = await db.exec("PRAGMA user_version")
+        version = (await version.fetchone())[0]
+        if version >= 3: return
+        if version < 1:
+            await self._migrate_trello_data_table(db)
+        if version < 2:
+            # Keep one row per member, preferring the one with a Trello ID, so the unique index can be built.
+            await db.exec(
+                "DELETE FROM Member WHERE id NOT IN (SELECT id FROM "\
+                "(SELECT id, ROW_NUMBER() OVER (PARTITION BY guild_id, discord_id "\
+                "ORDER BY (trello_id IS NULL OR trello_id = ''), id DESC) AS rank FROM Member) "\
+                "WHERE rank = 1)")
+            await db.exec(
+                "CREATE UNIQUE INDEX IF NOT EXISTS Member_guild_discord ON Member (guild_id, discord_id)")
+        # The card mirror used to be keyed by card alone, so guilds sharing a board took each
+        # other's rows. It only caches Trello, so drop it and let the next sync rebuild it.
+        await db.exec("DROP TABLE IF EXISTS TrelloCardMember")
+        await db.exec("DROP TABLE IF EXISTS TrelloCard")
+        await db.exec("DROP TABLE IF EXISTS TrelloCardSync")
+        await db.exec("PRAGMA user_version = 3")
+
+    async def _migrate_trello_data_table(self, db: PooledConnection) -> None:
+        exists = await db.exec(
+            "SELECT EXISTS(SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'TrelloData')")
+        exists = await exists.fetchone()
+        if exists[0]:
+            await db.exec(
+                "INSERT OR REPLACE INTO GuildCredentials (guild_id, key, token) "\
+                "SELECT k.guild_id, k.value, t.value FROM TrelloData k "\
+                "JOIN TrelloData t ON t.guild_id = k.guild_id AND t.item = 'token' "\
+                "WHERE k.item = 'key'")
+            await db.exec(
+                "INSERT OR IGNORE INTO UntrackedList (guild_id, list_name) "\
+                "SELECT guild_id, value FROM TrelloData WHERE item = 'trello_no_trace_list_name' ORDER BY rowid")
+            await db.exec(
+                "INSERT OR REPLACE INTO BoardEntryList (guild_id, board_id, list_id) "\
+                "SELECT guild_id, value, value2 FROM TrelloData "\
+                "WHERE item = 'board_id_list_id_to_create_card' ORDER BY rowid")
+            await db.exec(
+                "INSERT OR REPLACE INTO BoardKeywords (guild_id, board_id, keywords) "\
+                "SELECT guild_id, value, value2 FROM TrelloData WHERE item = 'board_keywords' ORDER BY rowid")
+            await db.exec("DROP TABLE TrelloData")
 
     # Member related
 
+    @instrumented
     async def insert_member(self, member: MemberData) -> None:
         """Insert a new member record into the database."""
         assert isinstance(member, MemberData)
@@ -92,32 +289,18 @@ class TaskOrcDB(DBHandler):
         assert member.discord_id
 
         async with self.start() as db:
-            row = await db.exec("SELECT * FROM Member WHERE guild_id = ? AND discord_id = ?",
-                member.guild_id, member.discord_id)
-            row = await row.fetchone()
-            if row:
-                await db.exec(
-                    "UPDATE Member SET name = ? WHERE guild_id = ? AND discord_id = ?",
-                    member.name, member.guild_id, member.discord_id
-                )
-            else:
-                await db.exec(
-                    "INSERT INTO Member (guild_id, name, discord_id, trello_id) VALUES (?, ?, ?, ?)",
-                    member.guild_id, member.name, member.discord_id, member.trello_id
-                )
+            await db.exec(self.UPSERT_MEMBER_SQL,
+                member.guild_id, member.name, member.discord_id, member.trello_id)
 
+    @instrumented
     async def update_trello_id(self, guild_id: str, discord_id: str, trello_id: str) -> None:
         """Add a Trello ID to an existing member record."""
         async with self.start() as db:
-            row = await db.exec("SELECT * FROM Member WHERE guild_id = ? AND discord_id = ?",
-                guild_id, discord_id)
-            row = await row.fetchone()
-            if row:
-                await db.exec(
-                    "UPDATE Member SET trello_id = ? WHERE guild_id = ? AND discord_id = ?",
-                    trello_id, guild_id, discord_id
-                )
-            else:
+            cursor = await db.exec(
+                "UPDATE Member SET trello_id = ? WHERE guild_id = ? AND discord_id = ?",
+                trello_id, guild_id, discord_id
+            )
+            if cursor.rowcount == 0:
                 print("\n\033[1;31m[TaskOrcDB] WARNING"\
                     "Unknown member with "\
                     f"guild_id \033[3m{guild_id}'\033[1;31m and "\
@@ -127,39 +310,96 @@ class TaskOrcDB(DBHandler):
                     "Skip.\033[0m\n")
 
     async def configure_guild_members(self, ctx:ApplicationContext) -> None:
-        member_list = []
-        async for member in ctx.guild.fetch_members():
-            # skip robot members
-            if member.bot:
-                continue
-            member_list.append({
-                "name": member.display_name,
-                "discord_id": member.id
-            })
-        await self.set_member_data(ctx.guild_id, member_list)
-
+        """Sync the guild's members from the gateway cache, writing only what changed."""
+        guild = ctx.guild
+        # The member cache is complete only once the guild has been chunked.
+        if not guild.chunked:
+            await guild.chunk()
+        # skip robot members
+        members = {str(m.id): m.display_name for m in guild.members if not m.bot}
+        await self.sync_member_data(ctx.guild_id, members)
+
+    @instrumented
+    async def sync_member_data(self, guild_id: Union[str, int], members: Dict[str, str]) -> Tuple[int, int, int]:
+        """Diff ``{discord_id: name}`` against the stored rows and apply only the changes.
+
+        Returns the numbers of joined, renamed and left members.
+        """
+        async with self.start(immediate=True) as db:
+            rows = await db.exec("SELECT discord_id, name FROM Member WHERE guild_id = ?", str(guild_id))
+            stored = dict(await rows.fetchall())
+            joined = [(str(guild_id), name, did, "") for did, name in members.items() if did not in stored]
+            renamed = [
+                (name, str(guild_id), did) for did, name in members.items()
+                if did in stored and stored[did] != name]
+            left = [(str(guild_id), did) for did in stored.keys() if did not in members]
+            if joined:
+                await db.exec_many(self.UPSERT_MEMBER_SQL, joined)
+            if renamed:
+                await db.exec_many("UPDATE Member SET name = ? WHERE guild_id = ? AND discord_id = ?", renamed)
+            if left:
+                await db.exec_many("DELETE FROM Member WHERE guild_id = ? AND discord_id = ?", left)
+        return len(joined), len(renamed), len(left)
+
+    def queue_member_upsert(self, guild_id: Union[str, int], discord_id: Union[str, int], name: str) -> None:
+        """Queue a join or rename; written by the next flush_member_changes()."""
+        self._pending_members[(str(guild_id), str(discord_id))] = name
+
+    def queue_member_removal(self, guild_id: Union[str, int], discord_id: Union[str, int]) -> None:
+        self._pending_members[(str(guild_id), str(discord_id))] = None
+
+    def pending_member_changes(self) -> int:
+        return len(self._pending_members)
+
+    async def flush_member_changes(self) -> int:
+        """Write queued member changes in one transaction; only the latest change per member is kept."""
+        # Checked before the instrumented part, so idle flushes every few seconds don't fill the stats.
+        if not self._pending_members: return 0
+        return await self._flush_member_changes()
+
+    @instrumented
+    async def _flush_member_changes(self) -> int:
+        pending, self._pending_members = self._pending_members, {}
+        upserts = [(gid, name, did, "") for (gid, did), name in pending.items() if name is not None]
+        removals = [(gid, did) for (gid, did), name in pending.items() if name is None]
+        try:
+            async with self.start() as db:
+                if upserts:
+                    await db.exec_many(self.UPSERT_MEMBER_SQL, upserts)
+                if removals:
+                    await db.exec_many("DELETE FROM Member WHERE guild_id = ? AND discord_id = ?", removals)
+        except sqlite3.Error:
+            # Put back what wasn't superseded while writing, for the next flush.
+            for key, name in pending.items():
+                self._pending_members.setdefault(key, name)
+            raise
+        return len(pending)
+
+    @instrumented
     @error_handler
-    async def get_member_data(self, guild_id: Union[str, int]) -> pd.DataFrame:
-        """Retrieve all member data as a Pandas DataFrame."""
+    async def get_member_data(self, guild_id: Union[str, int]) -> MemberTable:
+        """Retrieve all member data of a guild."""
         async with self.start() as db:
-            rows = await db.exec("SELECT * FROM Member WHERE guild_id = ?",
+            rows = await db.exec("SELECT id, guild_id, name, discord_id, trello_id FROM Member WHERE guild_id = ?",
                 guild_id
             )
             rows = await rows.fetchall()
-            return pd.DataFrame(
-                rows, columns=["id", "guild_id", "name", "discord_id", "trello_id"])
+            return MemberTable([MemberData.from_row(row) for row in rows])
 
-    async def get_discord_name_to_trello_id_dict(self, guild_id: Union[str, int], member_data: pd.DataFrame=None) -> Dict[str, str]:
+    @instrumented
+    async def get_discord_name_to_trello_id_dict(self, guild_id: Union[str, int], member_data: MemberTable=None) -> Dict[str, str]:
         """Retrieve member name from Trello ID."""
         if member_data is None:
             member_data = await self.get_member_data(guild_id)
-        return dict(zip(member_data["name"], member_data["trello_id"]))
+        return member_data.to_dict("name", "trello_id")
 
+    @instrumented
     async def get_trello_id_to_discord_name_dict(self, guild_id: Union[str, int]) -> Dict[str, str]:
         """Retrieve member name from Trello ID."""
         data = await self.get_member_data(guild_id)
-        return dict(zip(data["trello_id"], data["name"]))
+        return data.to_dict("trello_id", "name")
 
+    @instrumented
     async def get_trello_id_from_discord_id(self, guild_id: Union[str, int], discord_id: str) -> str:
         """Retrieve Trello ID from Discord ID."""
         async with self.start() as db:
@@ -169,136 +409,261 @@ class TaskOrcDB(DBHandler):
             rows = await rows.fetchone()
             return None if rows is None else rows[0]
 
+    @instrumented
     async def set_member_data(self, guild_id: str, member_list: list[dict]) -> None:
         """Set member data to the database."""
         async with self.start() as db:
-            for member in member_list:
-                await self.insert_member(
-                    MemberData(guild_id, member["name"], member["discord_id"]))
+            await db.exec_many(self.UPSERT_MEMBER_SQL, [
+                (guild_id, member["name"], member["discord_id"], "") for member in member_list])
 
     # Trello related
+    @instrumented
     async def set_trello_key_token(self, guild_id: str, key: str, token: str) -> bool:
         """Save Guild's Trello key and token to the database."""
 
-        key, token = encrypt(key), encrypt(token)
+        vault = default_vault()
+        plain = key, token
+        key, token = vault.encrypt(key), vault.encrypt(token)
 
-        async with self.start() as db:
+        async with self.start(immediate=True) as db:
             exists = await db.exec(
-                "SELECT EXISTS(SELECT 1 FROM TrelloData WHERE guild_id = ?)", guild_id)
+                "SELECT EXISTS(SELECT 1 FROM GuildCredentials WHERE guild_id = ?)", str(guild_id))
             exists = await exists.fetchone()
             print(f"[DBH] Exists = {exists}")
-            if exists[0]:
-                await db.exec(
-                    "UPDATE TrelloData SET value = ? WHERE guild_id = ? AND item = ?",
-                    key, guild_id, "key"
-                )
-                await db.exec(
-                    "UPDATE TrelloData SET value = ? WHERE guild_id = ? AND item = ?",
-                    token, guild_id, "token"
-                )
-                return True
-            else:
-                await db.exec(
-                    "INSERT INTO TrelloData (guild_id, item, value) VALUES (?, ?, ?)",
-                    guild_id, "key", key
-                )
-                await db.exec(
-                    "INSERT INTO TrelloData (guild_id, item, value) VALUES (?, ?, ?)",
-                    guild_id, "token", token
-                )
-                return False
+            await db.exec(
+                "INSERT OR REPLACE INTO GuildCredentials (guild_id, key, token) VALUES (?, ?, ?)",
+                str(guild_id), key, token
+            )
+        vault.put_credentials(guild_id, *plain)
+        return bool(exists[0])
 
+    @instrumented
     @error_handler
     async def get_trello_key_token(self, guild_id: str) -> Tuple[str, str]:
-        """Retrieve Guild's Trello key and token from the database."""
+        """Retrieve Guild's Trello key and token, decrypted once and then cached."""
+        vault = default_vault()
+        credentials = vault.get_credentials(guild_id)
+        if credentials is not None:
+            return credentials
         async with self.start() as db:
-            # get key and secret as strings
-            key = await db.exec(
-                "SELECT value FROM TrelloData WHERE guild_id = ? AND item = ?",
-                guild_id, "key"
-            )
-            token = await db.exec(
-                "SELECT value FROM TrelloData WHERE guild_id = ? AND item = ?",
-                guild_id, "token"
-            )
-            key = await key.fetchone()
-            token = await token.fetchone()
-            if key is None or token is None:
-                return None, None
-            return decrypt(key[0]), decrypt(token[0])
-
-
+            row = await db.exec(
+                "SELECT key, token FROM GuildCredentials WHERE guild_id = ?", str(guild_id))
+            row = await row.fetchone()
+        if row is None or row[0] is None or row[1] is None:
+            return None, None
+        credentials = vault.decrypt(row[0]), vault.decrypt(row[1])
+        vault.put_credentials(guild_id, *credentials)
+        return credentials
+
+    @instrumented
+    async def reencrypt_credentials(self, batch_size: int = 50) -> int:
+        """Re-encrypt stored credentials still using an old key with the primary key.
+
+        Runs in small batches, one short transaction each, yielding to the
+        event loop in between so commands keep being served.
+        """
+        vault = default_vault()
+        if not vault.can_rotate: return 0
+        rotated = 0
+        last_guild_id = ""
+        while True:
+            async with self.start(immediate=True) as db:
+                rows = await db.exec(
+                    "SELECT guild_id, key, token FROM GuildCredentials WHERE guild_id > ? "\
+                    "ORDER BY guild_id LIMIT ?", last_guild_id, batch_size)
+                rows = await rows.fetchall()
+                updates = [
+                    (vault.rotate(key), vault.rotate(token), guild_id, key, token)
+                    for guild_id, key, token in rows
+                    if vault.needs_rotation(key) or vault.needs_rotation(token)]
+                if updates:
+                    # Only replace what was read, so credentials saved meanwhile are not overwritten.
+                    cursor = await db.exec_many(
+                        "UPDATE GuildCredentials SET key = ?, token = ? "\
+                        "WHERE guild_id = ? AND key = ? AND token = ?", updates)
+                    rotated += cursor.rowcount
+            if len(rows) < batch_size:
+                return rotated
+            last_guild_id = rows[-1][0]
+            await asyncio.sleep(0)
+
+
+    @instrumented
     async def set_trello_traced_list_name_not_to_trace(self, guild_id: str, trello_no_trace_list_name: List[str]) -> None:
         """Save Trello traced list ID to the database."""
         async with self.start() as db:
-            exists = await db.exec(
-                "SELECT EXISTS(SELECT * FROM TrelloData WHERE guild_id = ? AND item = ?)", guild_id, "trello_no_trace_list_name")
-            exists = await exists.fetchall()
-            if exists:
-                await db.exec(
-                    "DELETE FROM TrelloData WHERE guild_id = ? AND item = ?",
-                    guild_id, "trello_no_trace_list_name"
-                )
-            for tid in trello_no_trace_list_name:
-                await db.exec(
-                    "INSERT INTO TrelloData (guild_id, item, value) VALUES (?, ?, ?)",
-                    guild_id, "trello_no_trace_list_name", tid
-                )
+            await db.exec("DELETE FROM UntrackedList WHERE guild_id = ?", str(guild_id))
+            await db.exec_many(
+                "INSERT OR IGNORE INTO UntrackedList (guild_id, list_name) VALUES (?, ?)",
+                [(str(guild_id), name) for name in trello_no_trace_list_name])
+        await self._update_trello_settings(guild_id, list_name_not_to_trace=trello_no_trace_list_name)
 
+    @instrumented
     async def set_trello_board_id_list_id_to_create_card(self, guild_id: str, board_id_list_id_to_create_card: Dict[str, str]) -> None:
         """Save Trello traced list ID to the database."""
         async with self.start() as db:
-            exists = await db.exec(
-                "SELECT EXISTS(SELECT * FROM TrelloData WHERE guild_id = ? AND item = ?)", guild_id, "board_id_list_id_to_create_card")
-            exists = await exists.fetchall()
-            if exists:
-                await db.exec(
-                    "DELETE FROM TrelloData WHERE guild_id = ? AND item = ?",
-                    guild_id, "board_id_list_id_to_create_card"
-                )
-            for bid, lid in board_id_list_id_to_create_card.items():
-                await db.exec(
-                    "INSERT INTO TrelloData (guild_id, item, value, value2) VALUES (?, ?, ?, ?)",
-                    guild_id, "board_id_list_id_to_create_card", bid, lid
-                )
-
+            await db.exec("DELETE FROM BoardEntryList WHERE guild_id = ?", str(guild_id))
+            await db.exec_many(
+                "INSERT INTO BoardEntryList (guild_id, board_id, list_id) VALUES (?, ?, ?)",
+                [(str(guild_id), bid, lid) for bid, lid in board_id_list_id_to_create_card.items()])
+        await self._update_trello_settings(
+            guild_id, board_id_list_id_to_create_card=board_id_list_id_to_create_card)
+
+    @instrumented
     async def set_trello_board_id_keywords(self, guild_id: str, board_keywords: Dict[str, str]) -> None:
         """Save keywords of Trello board ID to the database."""
         # {BoardID: "kw1,kw2, ...""}
         async with self.start() as db:
-            exists = await db.exec(
-                "SELECT EXISTS(SELECT * FROM TrelloData WHERE guild_id = ? AND item = ?)", guild_id, "board_keywords")
-            exists = await exists.fetchall()
-            if exists:
-                await db.exec(
-                    "DELETE FROM TrelloData WHERE guild_id = ? AND item = ?",
-                    guild_id, "board_keywords"
-                )
-            for bid, keywords in board_keywords.items():
-                await db.exec(
-                    "INSERT INTO TrelloData (guild_id, item, value, value2) VALUES (?, ?, ?, ?)",
-                    guild_id, "board_keywords", bid, keywords
-                )
-
+            await db.exec("DELETE FROM BoardKeywords WHERE guild_id = ?", str(guild_id))
+            await db.exec_many(
+                "INSERT INTO BoardKeywords (guild_id, board_id, keywords) VALUES (?, ?, ?)",
+                [(str(guild_id), bid, keywords) for bid, keywords in board_keywords.items()])
+        await self._update_trello_settings(guild_id, board_keywords=board_keywords)
+
+    async def get_trello_settings_version(self, guild_id: Union[str, int]) -> int:
+        """A counter bumped every time the guild's Trello settings are written."""
+        return int(await self.state.get(f"trello_settings_version:{guild_id}") or 0)
+
+    async def _update_trello_settings(self, guild_id: Union[str, int], **changes) -> None:
+        await self.state.incr(f"trello_settings_version:{guild_id}")
+        cached = await self.state.get(f"trello_settings:{guild_id}")
+        if cached is None: return
+        settings = json.loads(cached)
+        settings.update(changes)
+        settings = TrelloSettings(**settings)
+        await self.state.set(f"trello_settings:{guild_id}", json.dumps(settings.to_dict()))
+
+    @instrumented
     async def get_trello_settings(self, guild_id: Union[str, int]) -> TrelloSettings:
-        """Retrieve Trello settings from the database."""
+        """Retrieve Trello settings, from the cache when possible.
+
+        Callers get their own copy, since the configuration views edit it in place.
+        """
+        cached = await self.state.get(f"trello_settings:{guild_id}")
+        if cached is not None:
+            return TrelloSettings(**json.loads(cached))
+        version = await self.get_trello_settings_version(guild_id)
+        settings = await self._load_trello_settings(guild_id)
+        # Don't cache a read that raced with a write.
+        if version == await self.get_trello_settings_version(guild_id):
+            await self.state.set(f"trello_settings:{guild_id}", json.dumps(settings.to_dict()))
+        return settings
+
+    async def _load_trello_settings(self, guild_id: Union[str, int]) -> TrelloSettings:
+        list_name_not_to_trace = []
+        board_id_list_id_to_create_card = {}
+        board_keywords = {}
         async with self.start() as db:
-            trello_no_trace_list_name = await db.exec("SELECT * FROM TrelloData WHERE guild_id = ? AND item = ?",
-                guild_id, "trello_no_trace_list_name"
-            )
-            trello_no_trace_list_name = await trello_no_trace_list_name.fetchall()
+            rows = await db.exec(
+                "SELECT 0, list_name, NULL, rowid FROM UntrackedList WHERE guild_id = ?1 "\
+                "UNION ALL SELECT 1, board_id, list_id, rowid FROM BoardEntryList WHERE guild_id = ?1 "\
+                "UNION ALL SELECT 2, board_id, keywords, rowid FROM BoardKeywords WHERE guild_id = ?1 "\
+                "ORDER BY 1, 4", str(guild_id))
+            rows = await rows.fetchall()
+        for kind, name, value, _ in rows:
+            if kind == 0:
+                list_name_not_to_trace.append(name)
+            elif kind == 1:
+                board_id_list_id_to_create_card[name] = value
+            else:
+                board_keywords[name] = value
+        return TrelloSettings(list_name_not_to_trace, board_id_list_id_to_create_card, board_keywords)
 
-            board_id_list_id_to_create_card = await db.exec("SELECT * FROM TrelloData WHERE guild_id = ? AND item = ?",
-                guild_id, "board_id_list_id_to_create_card"
-            )
-            board_id_list_id_to_create_card = await board_id_list_id_to_create_card.fetchall()
 
-            board_keywords = await db.exec("SELECT * FROM TrelloData WHERE guild_id = ? AND item = ?",
-                guild_id, "board_keywords"
-            )
-            board_keywords = await board_keywords.fetchall()
-            return TrelloSettings(trello_no_trace_list_name, board_id_list_id_to_create_card, board_keywords)
+    # Trello card mirror related
+
+    @instrumented
+    async def get_card_sync_state(self, guild_id: Union[str, int]) -> Dict[str, str]:
+        """Retrieve the last sync timestamp of every mirrored board."""
+        async with self.start() as db:
+            rows = await db.exec(
+                "SELECT board_id, last_sync FROM TrelloCardSync WHERE guild_id = ?", str(guild_id))
+            rows = await rows.fetchall()
+            return dict(rows)
+
+    @instrumented
+    async def set_card_sync_state(self, guild_id: Union[str, int], board_id: str, last_sync: str) -> None:
+        """Save the last sync timestamp of a mirrored board."""
+        async with self.start() as db:
+            await db.exec(
+                "INSERT OR REPLACE INTO TrelloCardSync (guild_id, board_id, last_sync) VALUES (?, ?, ?)",
+                str(guild_id), board_id, last_sync)
+
+    @instrumented
+    async def upsert_cards(self, guild_id: Union[str, int], cards: List[MirroredCard]) -> None:
+        """Insert or replace mirrored cards together with their members."""
+        if not cards: return
+        guild_id = str(guild_id)
+        async with self.start() as db:
+            await db.exec_many(
+                "INSERT OR REPLACE INTO TrelloCard "\
+                "(card_id, guild_id, board_id, list_id, name, due, due_complete, labels, short_url) "\
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(card.card_id, guild_id, card.board_id, card.list_id, card.name,
+                  card.due, int(card.due_complete), ",".join(card.labels), card.short_url) for card in cards])
+            await db.exec_many(
+                "DELETE FROM TrelloCardMember WHERE guild_id = ? AND card_id = ?",
+                [(guild_id, card.card_id) for card in cards])
+            await db.exec_many(
+                "INSERT OR IGNORE INTO TrelloCardMember (card_id, guild_id, member_id) VALUES (?, ?, ?)",
+                [(card.card_id, guild_id, member_id) for card in cards for member_id in card.members])
+
+    @instrumented
+    async def delete_cards(
+            self,
+            guild_id: Union[str, int],
+            card_ids: List[str],
+            board_id: Optional[str] = None) -> None:
+        """Remove cards from the mirror; with ``board_id``, only while they are still on that board."""
+        if not card_ids: return
+        async with self.start(immediate=board_id is not None) as db:
+            if board_id is not None:
+                rows = await db.exec(
+                    "SELECT card_id FROM TrelloCard WHERE guild_id = ? AND board_id = ? "\
+                    f"AND card_id IN ({','.join('?' * len(card_ids))})",
+                    str(guild_id), board_id, *card_ids)
+                card_ids = [row[0] for row in await rows.fetchall()]
+            keys = [(str(guild_id), card_id) for card_id in card_ids]
+            await db.exec_many("DELETE FROM TrelloCard WHERE guild_id = ? AND card_id = ?", keys)
+            await db.exec_many("DELETE FROM TrelloCardMember WHERE guild_id = ? AND card_id = ?", keys)
+
+    @instrumented
+    async def delete_board_cards(self, guild_id: Union[str, int], board_id: str) -> None:
+        """Remove a board's cards and sync state from the mirror."""
+        async with self.start() as db:
+            await db.exec(
+                "DELETE FROM TrelloCardMember WHERE guild_id = ?1 AND card_id IN "\
+                "(SELECT card_id FROM TrelloCard WHERE guild_id = ?1 AND board_id = ?2)",
+                str(guild_id), board_id)
+            await db.exec(
+                "DELETE FROM TrelloCard WHERE guild_id = ? AND board_id = ?", str(guild_id), board_id)
+            await db.exec(
+                "DELETE FROM TrelloCardSync WHERE guild_id = ? AND board_id = ?", str(guild_id), board_id)
 
+    @instrumented
+    async def get_undone_cards(
+            self,
+            guild_id: Union[str, int],
+            trello_id: Optional[str] = None,
+            list_ids_not_to_trace: List[str] = []) -> List[MirroredCard]:
+        """Retrieve open, not completed cards from the mirror, sorted by due date."""
+        sql = "SELECT c.card_id, c.board_id, c.list_id, c.name, c.due, c.due_complete, c.labels, c.short_url, "\
+            "(SELECT group_concat(m.member_id) FROM TrelloCardMember m WHERE m.guild_id = c.guild_id AND m.card_id = c.card_id) "\
+            "FROM TrelloCard c WHERE c.guild_id = ? AND c.due_complete = 0 "\
+            "AND ',' || c.labels || ',' NOT LIKE '%,header,%'"
+        args = [str(guild_id)]
+        if trello_id:
+            sql += " AND c.card_id IN "\
+                "(SELECT card_id FROM TrelloCardMember WHERE guild_id = ? AND member_id = ?)"
+            args += [str(guild_id), trello_id]
+        if list_ids_not_to_trace:
+            sql += f" AND c.list_id NOT IN ({','.join('?' * len(list_ids_not_to_trace))})"
+            args += list(list_ids_not_to_trace)
+        sql += " ORDER BY c.due IS NULL, c.due"
+        async with self.start() as db:
+            rows = await db.exec(sql, *args)
+            rows = await rows.fetchall()
+            return [MirroredCard.from_row(row) for row in rows]
 
 
 async def test():
@@ -0,0 +1,207 @@
+import asyncio
+import bisect
+import os
+import sqlite3
+import time
+
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import aiosqlite
+
+from ezcord import log
+
+DEFAULT_PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("busy_timeout", 5000),
+    ("temp_store", "MEMORY"),
+    ("mmap_size", 256 * 1024 * 1024),
+    ("cache_size", -16 * 1024),  # negative values are KiB
+)
+
+
+class LatencyHistogram:
+    """Call count, returned rows and a fixed-bucket latency histogram of one query method."""
+    BOUNDS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.rows = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * (len(self.BOUNDS_MS) + 1)  # the last bucket is everything slower
+
+    def record(self, elapsed_ms: float, rows: int) -> None:
+        self.count += 1
+        self.rows += rows
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.buckets[bisect.bisect_left(self.BOUNDS_MS, elapsed_ms)] += 1
+
+    def percentile(self, p: float) -> float:
+        """Upper bound, in ms, of the bucket holding the p-th percentile, capped at the slowest call."""
+        if self.count == 0: return 0.0
+        rank = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank:
+                return min(self.BOUNDS_MS[i], self.max_ms) if i < len(self.BOUNDS_MS) else self.max_ms
+        return self.max_ms
+
+
+class QueryStats:
+    """Latency histograms keyed by method name."""
+
+    def __init__(self) -> None:
+        self.methods: Dict[str, LatencyHistogram] = {}
+
+    def record(self, name: str, elapsed_ms: float, rows: int) -> None:
+        if name not in self.methods:
+            self.methods[name] = LatencyHistogram()
+        self.methods[name].record(elapsed_ms, rows)
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """One row per method, slowest p95 first."""
+        rows = [{
+            "method": name,
+            "count": h.count,
+            "rows": h.rows,
+            "p50": h.percentile(50),
+            "p95": h.percentile(95),
+            "p99": h.percentile(99),
+            "max": h.max_ms,
+        } for name, h in self.methods.items()]
+        return sorted(rows, key=lambda r: r["p95"], reverse=True)
+
+    def reset(self) -> None:
+        self.methods.clear()
+
+
+class PooledConnection:
+    """One checked-out pool connection, used as ``async with pool.connection() as db``.
+
+    The block runs as one transaction, begun on entry and committed when it
+    exits, or rolled back if it raises. Pass ``immediate=True`` for blocks
+    that read before they write: the write lock is then taken up front, so
+    no other writer can change the rows in between.
+    """
+
+    def __init__(self, pool: "SQLitePool", immediate: bool = False) -> None:
+        self.pool = pool
+        self.immediate = immediate
+        self.connection: Optional[aiosqlite.Connection] = None
+
+    async def __aenter__(self) -> "PooledConnection":
+        connection = await self.pool.acquire()
+        try:
+            # sqlite3 would only begin before the first write, leaving earlier reads outside the transaction.
+            await connection.execute("BEGIN IMMEDIATE" if self.immediate else "BEGIN")
+        except BaseException:
+            self.pool.release(connection)
+            raise
+        self.connection = connection
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        connection, self.connection = self.connection, None
+        try:
+            if exc_type is None:
+                await connection.commit()
+            else:
+                await connection.rollback()
+        finally:
+            self.pool.release(connection)
+
+    async def exec(self, sql: str, *args) -> aiosqlite.Cursor:
+        started = time.perf_counter()
+        cursor = await self.connection.execute(sql, args)
+        await self._check_slow(sql, args, started)
+        return cursor
+
+    async def exec_many(self, sql: str, rows: Iterable[Tuple[Any, ...]]) -> aiosqlite.Cursor:
+        rows = list(rows)
+        started = time.perf_counter()
+        cursor = await self.connection.executemany(sql, rows)
+        await self._check_slow(sql, rows[0] if rows else (), started, len(rows))
+        return cursor
+
+    async def _check_slow(self, sql: str, args: Tuple[Any, ...], started: float, batch: int = 1) -> None:
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if self.pool.slow_query_ms is None or elapsed_ms < self.pool.slow_query_ms: return
+        try:
+            plan = await self.connection.execute_fetchall(f"EXPLAIN QUERY PLAN {sql}", args)
+            plan = "\n".join(f"  {row[-1]}" for row in plan)
+        except sqlite3.Error as e:
+            plan = f"  (no plan: {e})"
+        batch = f" x{batch}" if batch != 1 else ""
+        log.warning(f"[TaskOrcDB] Slow query ({elapsed_ms:.1f} ms{batch}): {sql}\n{plan}")
+
+
+class SQLitePool:
+    """A fixed set of long-lived aiosqlite connections to one database file.
+
+    Connections are opened lazily on first use with WAL journaling and the
+    given pragmas, and keep their prepared-statement cache for their whole
+    lifetime instead of rebuilding it on every query.
+    """
+
+    def __init__(
+            self,
+            path: str,
+            size: int = 4,
+            pragmas: Iterable[Tuple[str, Any]] = DEFAULT_PRAGMAS,
+            cached_statements: int = 256,
+            foreign_keys: bool = False,
+            slow_query_ms: Optional[float] = None) -> None:
+        self.path = path
+        self.size = size
+        self.pragmas = list(pragmas)
+        self.cached_statements = cached_statements
+        self.foreign_keys = foreign_keys
+        # Statements slower than this are logged with their query plan; None disables it.
+        if slow_query_ms is None and os.environ.get("TASKORC_SLOW_QUERY_MS"):
+            slow_query_ms = float(os.environ["TASKORC_SLOW_QUERY_MS"])
+        self.slow_query_ms = slow_query_ms
+        self._all: List[aiosqlite.Connection] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._opening = 0
+
+    def connection(self, immediate: bool = False) -> PooledConnection:
+        return PooledConnection(self, immediate)
+
+    async def _open(self) -> aiosqlite.Connection:
+        connection = await aiosqlite.connect(self.path, cached_statements=self.cached_statements)
+        for name, value in self.pragmas:
+            await connection.execute(f"PRAGMA {name} = {value}")
+        if self.foreign_keys:
+            await connection.execute("PRAGMA foreign_keys = ON")
+        return connection
+
+    async def acquire(self) -> aiosqlite.Connection:
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+        if self._idle.empty() and len(self._all) + self._opening < self.size:
+            self._opening += 1
+            try:
+                connection = await self._open()
+            finally:
+                self._opening -= 1
+            self._all.append(connection)
+            return connection
+        return await self._idle.get()
+
+    def release(self, connection: aiosqlite.Connection) -> None:
+        if connection in self._all:
+            self._idle.put_nowait(connection)
+
+    async def close(self) -> None:
+        connections, self._all = self._all, []
+        self._idle = None
+        for connection in connections:
+            await connection.close()
@@ -6,39 +6,30 @@ import questionary
 
 from cryptography.fernet import Fernet
 
+from credential_vault import default_vault
 
 
-def encrypt(plain_text):
-    key = os.environ.get("ENCRYPT_KEY")
-
-    if not key:
-        raise ValueError("No encryption key found. Please run `python encrypt.py -g` to generate a key")
 
-    cipher_suite = Fernet(base64.b64decode(key))
-    encrypted_binary = cipher_suite.encrypt(plain_text.encode())
-    encoded_encrypted = base64.b64encode(encrypted_binary).decode()
-
-    return encoded_encrypted
+def encrypt(plain_text):
+    return default_vault().encrypt(plain_text)
 
 def decrypt(cipher_text):
-    key = os.environ.get("ENCRYPT_KEY")
+    return default_vault().decrypt(cipher_text)
 
-    if not key:
-        raise ValueError("No encryption key found. Please run `python encrypt.py -g` to generate a key")
-
-    cipher_suite = Fernet(base64.b64decode(key))
-    decoded = base64.b64decode(cipher_text)
-    decrypted = cipher_suite.decrypt(decoded).decode()
-    return decrypted
-
-def gen_key():
+def gen_key(rotate=False):
 
     dotenv.load_dotenv()
 
     binary_key = Fernet.generate_key()
     encoded_key = base64.b64encode(binary_key).decode()
 
-    if os.environ.get("ENCRYPT_KEY"):
+    if rotate:
+        # The new key becomes primary; old ones stay to decrypt until re-encrypted.
+        if not os.environ.get("ENCRYPT_KEY"):
+            print("No key to rotate. Use -g to generate one.")
+            exit(1)
+        encoded_key = f"{encoded_key},{os.environ['ENCRYPT_KEY']}"
+    elif os.environ.get("ENCRYPT_KEY"):
         if not questionary.confirm(
                 "Key already exists. Do you want to overwrite it?").ask():
             print(f"Key was not overwritten.")
@@ -53,10 +44,12 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument(
         "-g", "--generate", help="Generate a new encryption key", action="store_true")
+    parser.add_argument(
+        "-r", "--rotate", help="Generate a new primary key and keep the old ones for decryption", action="store_true")
 
     args = parser.parse_args()
 
-    if args.generate:
-        gen_key()
+    if args.generate or args.rotate:
+        gen_key(rotate=args.rotate)
     else:
         print("No arguments were provided. Use -h or --help for help")
\ No newline at end of file
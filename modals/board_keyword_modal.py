@@ -68,4 +68,5 @@ class BoardKeywordModal(discord.ui.Modal):
         await self.data.set_trello_board_id_keywords(
             self.ctx.guild_id,
             self.trello_settings.board_keywords)
+        await self.ctx.bot.trello.invalidate_metadata(self.ctx.guild_id)
         await interaction.response.send_message(embeds=[embed])
\ No newline at end of file
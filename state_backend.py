@@ -0,0 +1,132 @@
+import abc
+import os
+import time
+
+from typing import Any
+from typing import Dict
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+
+class StateBackend(abc.ABC):
+    """Key-value store for state shared between bot processes.
+
+    Values are strings. The in-memory backend serves a single process;
+    :class:`RedisStateBackend` lets several shard processes share settings,
+    cache versions and dedup sets.
+    """
+
+    @abc.abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        ...
+
+    @abc.abstractmethod
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+    @abc.abstractmethod
+    async def incr(self, key: str) -> int:
+        ...
+
+    @abc.abstractmethod
+    async def add_to_set(self, key: str, *members: str) -> Set[str]:
+        """Add members to a set and return the ones that were not in it yet."""
+
+    async def close(self) -> None:
+        pass
+
+
+class MemoryStateBackend(StateBackend):
+
+    def __init__(self) -> None:
+        self._values: Dict[str, Tuple[str, Optional[float]]] = {}  # {key: (value, expires_at)}
+        self._sets: Dict[str, Set[str]] = {}
+
+    def _get(self, key: str) -> Optional[str]:
+        item = self._values.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._values[key]
+            return None
+        return value
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._get(key)
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        self._values[key] = (value, time.monotonic() + ttl if ttl else None)
+
+    async def delete(self, key: str) -> None:
+        self._values.pop(key, None)
+        self._sets.pop(key, None)
+
+    async def incr(self, key: str) -> int:
+        value = int(self._get(key) or 0) + 1
+        self._values[key] = (str(value), None)
+        return value
+
+    async def add_to_set(self, key: str, *members: str) -> Set[str]:
+        current = self._sets.setdefault(key, set())
+        added = set(members) - current
+        current.update(added)
+        return added
+
+
+class RedisStateBackend(StateBackend):
+    """Backend speaking the Redis protocol through ``redis.asyncio``.
+
+    Pass a ready client (e.g. ``fakeredis.aioredis.FakeRedis()`` for local
+    runs) or a URL; ``redis`` is only imported when a URL is given.
+    """
+
+    def __init__(self, url: Optional[str] = None, client: Any = None, prefix: str = "taskorc:") -> None:
+        if client is None:
+            import redis.asyncio as redis
+            client = redis.from_url(url, decode_responses=True)
+        self.client = client
+        self.prefix = prefix
+
+    @staticmethod
+    def _decode(value: Any) -> Any:
+        return value.decode() if isinstance(value, bytes) else value
+
+    async def get(self, key: str) -> Optional[str]:
+        return self._decode(await self.client.get(self.prefix + key))
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        await self.client.set(self.prefix + key, value, px=int(ttl * 1000) if ttl else None)
+
+    async def delete(self, key: str) -> None:
+        await self.client.delete(self.prefix + key)
+
+    async def incr(self, key: str) -> int:
+        return int(await self.client.incr(self.prefix + key))
+
+    async def add_to_set(self, key: str, *members: str) -> Set[str]:
+        if not members:
+            return set()
+        # SADD only reports how many were new, so check membership in the same round trip.
+        pipe = self.client.pipeline(transaction=True)
+        pipe.smismember(self.prefix + key, list(members))
+        pipe.sadd(self.prefix + key, *members)
+        present, _ = await pipe.execute()
+        return {m for m, p in zip(members, present) if not p}
+
+    async def close(self) -> None:
+        close = getattr(self.client, "aclose", None) or self.client.close
+        await close()
+
+
+def state_backend_from_env() -> StateBackend:
+    """Redis when ``TASKORC_STATE_URL`` is set (e.g. ``redis://localhost:6379/0``), memory otherwise."""
+    url = os.environ.get("TASKORC_STATE_URL")
+    if url:
+        return RedisStateBackend(url)
+    return MemoryStateBackend()
@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def in_tmp_path(tmp_path, monkeypatch):
+    """Run the test from an empty directory, since TaskOrcDB opens ``taskorc.db`` in the working directory."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
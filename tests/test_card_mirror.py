@@ -0,0 +1,117 @@
+import asyncio
+import sqlite3
+
+from database_handler import MirroredCard
+from database_handler import TaskOrcDB
+from trello_client import AsyncTrelloClient
+from trello_client import Board
+from trello_client import ResourceUnavailable
+from trello_handler import TrelloHandler
+
+
+def _card(card_id, members):
+    return MirroredCard(card_id, "b0", "l0", f"Card {card_id}", None, False, [], f"https://trello.com/c/{card_id}", members)
+
+
+def test_guilds_sharing_a_board_keep_their_own_rows(in_tmp_path):
+    async def run():
+        db = TaskOrcDB()
+        try:
+            await db.setup()
+            cards = [_card(f"c{i}", ["m1", "m2"]) for i in range(4)]
+            await db.upsert_cards("1", cards)
+            await db.upsert_cards("2", cards)
+            assert len(await db.get_undone_cards("1")) == 4
+            assert len(await db.get_undone_cards("2")) == 4
+
+            await db.upsert_cards("2", [_card("c0", ["m3"])])
+            assert [c.members for c in await db.get_undone_cards("1", trello_id="m1")][0] == ["m1", "m2"]
+            assert [c.card_id for c in await db.get_undone_cards("2", trello_id="m3")] == ["c0"]
+
+            await db.delete_board_cards("2", "b0")
+            assert await db.get_undone_cards("2") == []
+            undone = await db.get_undone_cards("1", trello_id="m2")
+            assert sorted(c.card_id for c in undone) == ["c0", "c1", "c2", "c3"]
+        finally:
+            await db.close()
+    asyncio.run(run())
+
+
+def test_old_card_mirror_is_rebuilt(in_tmp_path):
+    connection = sqlite3.connect("taskorc.db")
+    connection.executescript(
+        "CREATE TABLE TrelloCard (card_id TEXT PRIMARY KEY, guild_id TEXT, board_id TEXT, list_id TEXT, "
+        "name TEXT, due TEXT, due_complete INTEGER, labels TEXT, short_url TEXT);"
+        "CREATE TABLE TrelloCardMember (card_id TEXT, guild_id TEXT, member_id TEXT, PRIMARY KEY (card_id, member_id));"
+        "CREATE TABLE TrelloCardSync (guild_id TEXT, board_id TEXT, last_sync TEXT, PRIMARY KEY (guild_id, board_id));"
+        "INSERT INTO TrelloCard VALUES ('c0', '1', 'b0', 'l0', 'Card', NULL, 0, '', '');"
+        "INSERT INTO TrelloCardSync VALUES ('1', 'b0', '2024-01-01T00:00:00.000Z');"
+        "PRAGMA user_version = 2;")
+    connection.close()
+
+    async def run():
+        db = TaskOrcDB()
+        try:
+            await db.setup()
+            # The mirror starts over, so the next sync reloads the board.
+            assert await db.get_card_sync_state("1") == {}
+            await db.upsert_cards("1", [_card("c0", [])])
+            await db.upsert_cards("2", [_card("c0", [])])
+            assert len(await db.get_undone_cards("1")) == 1
+        finally:
+            await db.close()
+    asyncio.run(run())
+
+
+class FakeTrelloClient(AsyncTrelloClient):
+    """Serves board actions and cards from dicts instead of calling Trello."""
+
+    def __init__(self, actions, cards):
+        super().__init__("key", "token", guild_id="1")
+        self.actions = actions  # {board_id: [action, ]}
+        self.cards = cards  # {card_id: card json}
+
+    async def fetch_json(self, uri_path, http_method="GET", query_params=None, post_args=None, batchable=False):
+        parts = uri_path.strip("/").split("/")
+        if parts[0] == "boards" and parts[2] == "actions":
+            self.action_params = query_params
+            return self.actions.get(parts[1], [])
+        if parts[0] == "cards":
+            if parts[1] not in self.cards:
+                raise ResourceUnavailable("The requested resource was not found.", 404)
+            return self.cards[parts[1]]
+        raise AssertionError(uri_path)
+
+
+def test_card_moved_between_boards_stays_mirrored(in_tmp_path):
+    async def run():
+        db = TaskOrcDB()
+        try:
+            await db.setup()
+            await db.upsert_cards("1", [_card("c0", [])])
+            moved = {"id": "c0", "name": "Card c0", "idBoard": "b1", "idList": "l1", "idMembers": []}
+            trello = FakeTrelloClient({
+                "b0": [{"type": "moveCardFromBoard", "date": "2024-01-01T00:00:02.000Z", "data": {"card": {"id": "c0"}}}],
+                "b1": [{"type": "moveCardToBoard", "date": "2024-01-01T00:00:01.000Z", "data": {"card": {"id": "c0"}}}],
+            }, {"c0": moved})
+            handler = TrelloHandler()
+            board_ids = {"b0", "b1"}
+            since = "2024-01-01T00:00:00.000Z"
+            # The destination board syncs first, then the source board.
+            await handler._sync_board_cards(trello, db, Board(trello, "b1"), since, board_ids)
+            await handler._sync_board_cards(trello, db, Board(trello, "b0"), since, board_ids)
+            assert [(c.card_id, c.board_id) for c in await db.get_undone_cards("1")] == [("c0", "b1")]
+            # Only what the sync reads is requested.
+            assert trello.action_params["fields"] == "type,date,data"
+            assert trello.action_params["memberCreator"] is False
+            assert trello.action_params["member"] is False
+
+            # Moved to a board the guild does not mirror: dropped.
+            trello.cards["c0"] = dict(moved, idBoard="elsewhere")
+            trello.actions["b1"] = [
+                {"type": "moveCardFromBoard", "date": "2024-01-01T00:00:03.000Z", "data": {"card": {"id": "c0"}}}]
+            await handler._sync_board_cards(trello, db, Board(trello, "b1"), since, board_ids)
+            assert await db.get_undone_cards("1") == []
+        finally:
+            await db.close()
+    asyncio.run(run())
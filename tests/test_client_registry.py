@@ -0,0 +1,36 @@
+import asyncio
+
+import pytest
+
+from trello_client import AsyncTrelloClient
+from trello_handler import ClientRegistry
+from trello_handler import TrelloHandler
+
+
+def test_evicted_clients_do_not_reconnect():
+    async def run():
+        evicted = []
+        registry = ClientRegistry(max_size=1, on_evict=evicted.append)
+        first = AsyncTrelloClient("key", "token", guild_id="1")
+        await registry.put("1", first)
+        first._get_session()
+        await registry.put("2", AsyncTrelloClient("key", "token", guild_id="2"))
+        assert evicted == ["1"]
+        assert registry.get("1") is None
+        with pytest.raises(RuntimeError, match="closed"):
+            await first.fetch_json("/members/me")
+        await registry.close()
+    asyncio.run(run())
+
+
+def test_handler_close_closes_every_client():
+    async def run():
+        handler = TrelloHandler()
+        clients = [AsyncTrelloClient("key", "token", guild_id=str(i)) for i in range(3)]
+        for client in clients:
+            await handler._clients.put(client.guild_id, client)
+            client._get_session()
+        await handler.close()
+        assert all(client.closed and client._session is None for client in clients)
+        assert len(handler._clients) == 0
+    asyncio.run(run())
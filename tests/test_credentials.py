@@ -0,0 +1,37 @@
+import asyncio
+import base64
+
+from cryptography.fernet import Fernet
+
+from credential_vault import default_vault
+from database_handler import TaskOrcDB
+
+
+def _key():
+    return base64.b64encode(Fernet.generate_key()).decode()
+
+
+def test_reencrypt_moves_credentials_to_the_primary_key(in_tmp_path, monkeypatch):
+    old, new = _key(), _key()
+
+    async def run():
+        db = TaskOrcDB()
+        try:
+            await db.setup()
+            monkeypatch.setenv("ENCRYPT_KEY", old)
+            for guild_id in ("1", "2", "3"):
+                await db.set_trello_key_token(guild_id, f"key{guild_id}", f"token{guild_id}")
+            monkeypatch.setenv("ENCRYPT_KEY", f"{new},{old}")
+            await db.set_trello_key_token("3", "key3b", "token3b")
+
+            assert await db.reencrypt_credentials(batch_size=2) == 2
+            assert await db.reencrypt_credentials() == 0
+            async with db.start() as c:
+                rows = await (await c.exec("SELECT key, token FROM GuildCredentials")).fetchall()
+            vault = default_vault()
+            assert not any(vault.needs_rotation(v) for row in rows for v in row)
+            vault.forget_credentials("3")
+            assert await db.get_trello_key_token("3") == ("key3b", "token3b")
+        finally:
+            await db.close()
+    asyncio.run(run())
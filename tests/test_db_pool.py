@@ -0,0 +1,79 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from db_pool import LatencyHistogram
+from db_pool import SQLitePool
+
+
+def _create(path):
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE T (x INTEGER)")
+    connection.commit()
+    return connection
+
+
+def test_reads_share_one_snapshot(in_tmp_path):
+    other = _create("test.db")
+
+    async def run():
+        pool = SQLitePool("test.db", size=1)
+        try:
+            async with pool.connection() as db:
+                before = await (await db.exec("SELECT count(*) FROM T")).fetchone()
+                other.execute("INSERT INTO T VALUES (1)")
+                other.commit()
+                after = await (await db.exec("SELECT count(*) FROM T")).fetchone()
+            assert before == after == (0,)
+        finally:
+            await pool.close()
+    asyncio.run(run())
+    other.close()
+
+
+def test_immediate_blocks_other_writers(in_tmp_path):
+    other = _create("test.db")
+    other.execute("PRAGMA busy_timeout = 0")
+
+    async def run():
+        pool = SQLitePool("test.db", size=1)
+        try:
+            async with pool.connection(immediate=True) as db:
+                await db.exec("SELECT count(*) FROM T")
+                with pytest.raises(sqlite3.OperationalError, match="locked"):
+                    other.execute("INSERT INTO T VALUES (1)")
+                await db.exec("INSERT INTO T VALUES (2)")
+            other.rollback()
+            assert other.execute("SELECT x FROM T").fetchall() == [(2,)]
+        finally:
+            await pool.close()
+    asyncio.run(run())
+    other.close()
+
+
+def test_failed_block_is_rolled_back(in_tmp_path):
+    _create("test.db").close()
+
+    async def run():
+        pool = SQLitePool("test.db", size=1)
+        try:
+            with pytest.raises(RuntimeError):
+                async with pool.connection() as db:
+                    await db.exec("INSERT INTO T VALUES (1)")
+                    raise RuntimeError
+            async with pool.connection() as db:
+                assert await (await db.exec("SELECT count(*) FROM T")).fetchone() == (0,)
+        finally:
+            await pool.close()
+    asyncio.run(run())
+
+
+def test_percentiles_are_capped_at_the_slowest_call():
+    h = LatencyHistogram()
+    for elapsed_ms in (1.2, 3.4, 5.8):
+        h.record(elapsed_ms, 0)
+    assert h.percentile(50) == 5
+    assert h.percentile(99) == 5.8
+    h.record(20000, 0)
+    assert h.percentile(100) == 20000
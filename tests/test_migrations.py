@@ -0,0 +1,121 @@
+import asyncio
+import base64
+import sqlite3
+
+from cryptography.fernet import Fernet
+
+from credential_vault import default_vault
+from database_handler import TaskOrcDB
+
+
+def _seed_old_database(rows):
+    """Create ``taskorc.db`` the way versions before the typed settings tables did."""
+    connection = sqlite3.connect("taskorc.db")
+    connection.execute(
+        "CREATE TABLE Member (id INTEGER PRIMARY KEY, guild_id TEXT, name TEXT, discord_id TEXT, trello_id TEXT)")
+    connection.execute("CREATE TABLE TrelloData(guild_id TEXT, item TEXT, value TEXT, value2 TEXT)")
+    connection.executemany("INSERT INTO TrelloData (guild_id, item, value, value2) VALUES (?, ?, ?, ?)", rows)
+    connection.commit()
+    connection.close()
+
+
+def _tables():
+    connection = sqlite3.connect("taskorc.db")
+    names = {row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    version = connection.execute("PRAGMA user_version").fetchone()[0]
+    connection.close()
+    return names, version
+
+
+def test_trello_data_moves_to_typed_tables(in_tmp_path, monkeypatch):
+    monkeypatch.setenv("ENCRYPT_KEY", base64.b64encode(Fernet.generate_key()).decode())
+    vault = default_vault()
+    _seed_old_database([
+        ("1", "key", vault.encrypt("key1"), None),
+        ("1", "token", vault.encrypt("token1"), None),
+        ("1", "trello_no_trace_list_name", "Done", None),
+        ("1", "trello_no_trace_list_name", "Archive", None),
+        ("1", "board_id_list_id_to_create_card", "b0", "l0"),
+        ("1", "board_id_list_id_to_create_card", "b1", "l1"),
+        ("1", "board_keywords", "b0", "design,art"),
+        ("1", "board_keywords", "b1", ""),
+        ("1", "board_keywords", "b2", ""),
+        ("2", "board_keywords", "b3", "music"),
+        ("2", "board_keywords", "b4", "video"),
+    ])
+
+    async def run():
+        db = TaskOrcDB()
+        try:
+            await db.setup()
+            assert await db.get_trello_key_token("1") == ("key1", "token1")
+            assert await db.get_trello_key_token("2") == (None, None)
+
+            settings = await db.get_trello_settings("1")
+            assert settings.list_name_not_to_trace == ["Done", "Archive"]
+            assert settings.board_id_list_id_to_create_card == {"b0": "l0", "b1": "l1"}
+            assert settings.board_keywords == {"b0": "design,art", "b1": "", "b2": ""}
+            # The last board without keywords, otherwise the first board.
+            assert settings.default_board == "b2"
+            assert (await db.get_trello_settings("2")).default_board == "b3"
+        finally:
+            await db.close()
+    asyncio.run(run())
+
+    names, version = _tables()
+    assert "TrelloData" not in names
+    assert {"GuildCredentials", "UntrackedList", "BoardEntryList", "BoardKeywords"} <= names
+    assert version == 3
+
+
+def test_setup_can_run_twice(in_tmp_path):
+    _seed_old_database([("1", "board_keywords", "b0", "")])
+
+    async def run():
+        for first in (True, False):
+            db = TaskOrcDB()
+            try:
+                await db.setup()
+                if first:
+                    await db.set_trello_board_id_keywords("1", {"b0": "", "b1": "kw"})
+                settings = await db.get_trello_settings("1")
+                assert settings.board_keywords == {"b0": "", "b1": "kw"}
+            finally:
+                await db.close()
+    asyncio.run(run())
+    assert _tables()[1] == 3
+
+
+def test_duplicate_members_collapse_keeping_trello_ids(in_tmp_path):
+    _seed_old_database([])
+    connection = sqlite3.connect("taskorc.db")
+    connection.executemany("INSERT INTO Member (id, guild_id, name, discord_id, trello_id) VALUES (?, ?, ?, ?, ?)", [
+        (1, "1", "Alice", "10", "t10"),
+        (2, "1", "Alice again", "10", ""),
+        (3, "1", "Bob", "11", None),
+        (4, "1", "Bob renamed", "11", ""),
+        (5, "2", "Alice", "10", None),
+    ])
+    connection.commit()
+    connection.close()
+
+    async def run():
+        db = TaskOrcDB()
+        try:
+            await db.setup()
+            members = {(m.guild_id, m.discord_id): (m.id, m.name, m.trello_id) for m in await db.get_member_data("1")}
+            assert members == {("1", "10"): (1, "Alice", "t10"), ("1", "11"): (4, "Bob renamed", "")}
+            assert len(await db.get_member_data("2")) == 1
+
+            # Later writes go through the unique index: a rename keeps the Trello ID.
+            await db.sync_member_data("1", {"10": "Alice Liddell", "11": "Bob renamed"})
+            assert await db.get_trello_id_from_discord_id("1", "10") == "t10"
+            assert len(await db.get_member_data("1")) == 2
+        finally:
+            await db.close()
+    asyncio.run(run())
+
+    connection = sqlite3.connect("taskorc.db")
+    indexes = [row[1] for row in connection.execute("PRAGMA index_list(Member)")]
+    connection.close()
+    assert "Member_guild_discord" in indexes
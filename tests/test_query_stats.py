@@ -0,0 +1,27 @@
+import asyncio
+
+from database_handler import TaskOrcDB
+
+
+def test_stats_count_rows_and_skip_idle_flushes(in_tmp_path):
+    async def run():
+        db = TaskOrcDB()
+        try:
+            await db.setup()
+            assert await db.flush_member_changes() == 0
+            db.queue_member_upsert("1", "10", "Alice")
+            db.queue_member_upsert("1", "11", "Bob")
+            assert await db.flush_member_changes() == 2
+            await db.get_member_data("1")
+            await db.get_trello_settings("1")
+            await db.get_trello_id_from_discord_id("1", "10")
+
+            methods = db.query_stats.methods
+            assert methods["_flush_member_changes"].count == 1
+            assert methods["_flush_member_changes"].rows == 0
+            assert methods["get_member_data"].rows == 2
+            assert methods["get_trello_settings"].rows == 0
+            assert methods["get_trello_id_from_discord_id"].rows == 0
+        finally:
+            await db.close()
+    asyncio.run(run())
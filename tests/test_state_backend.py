@@ -0,0 +1,49 @@
+import asyncio
+
+import pytest
+
+from state_backend import MemoryStateBackend
+from state_backend import RedisStateBackend
+from state_backend import StateBackend
+
+
+def test_state_backend_is_abstract():
+    with pytest.raises(TypeError):
+        StateBackend()
+
+
+def _check_contract(backend):
+    async def run():
+        assert await backend.get("missing") is None
+        await backend.set("k", "v")
+        assert await backend.get("k") == "v"
+        assert await backend.incr("n") == 1
+        assert await backend.incr("n") == 2
+        assert await backend.get("n") == "2"
+        assert await backend.add_to_set("s", "a", "b") == {"a", "b"}
+        assert await backend.add_to_set("s", "b", "c") == {"c"}
+        await backend.delete("k")
+        await backend.delete("s")
+        assert await backend.get("k") is None
+        assert await backend.add_to_set("s", "a") == {"a"}
+        await backend.close()
+    asyncio.run(run())
+
+
+def test_memory_backend_contract():
+    _check_contract(MemoryStateBackend())
+
+
+def test_redis_backend_contract():
+    fakeredis = pytest.importorskip("fakeredis")
+    _check_contract(RedisStateBackend(client=fakeredis.FakeAsyncRedis(decode_responses=True)))
+
+
+def test_memory_sets_are_not_values():
+    async def run():
+        backend = MemoryStateBackend()
+        await backend.add_to_set("s", "a")
+        assert await backend.get("s") is None
+        assert await backend.incr("s") == 1
+        assert await backend.add_to_set("s", "a") == set()
+    asyncio.run(run())
@@ -0,0 +1,66 @@
+import datetime
+
+import numpy as np
+import pytest
+
+from utils.task_parser import parse_tasks
+from utils.task_parser import validate
+
+THIS_YEAR = datetime.date.today().year
+OVERWRITE = datetime.date(2024, 6, 15)
+
+
+# Expected values were produced by validate() before it got the compact-date fast path.
+@pytest.mark.parametrize("text, check_over, expected", [
+    ("0105", False, datetime.date(THIS_YEAR, 1, 5)),
+    ("105", False, datetime.date(THIS_YEAR, 1, 5)),
+    ("1231", False, datetime.date(THIS_YEAR, 12, 31)),
+    ("240105", False, datetime.date(2024, 1, 5)),
+    ("240105", True, datetime.date(2025, 1, 5)),
+    ("20240105", False, datetime.date(2024, 1, 5)),
+    ("20240105", True, datetime.date(2025, 1, 5)),
+    ("20240620", True, datetime.date(2024, 6, 20)),
+    ("2024-01-05", True, datetime.date(2025, 1, 5)),
+    ("2024/2/29", False, datetime.date(2024, 2, 29)),
+    ("2024/2/29", True, datetime.date(2025, 2, 28)),
+    ("12/25", False, datetime.date(THIS_YEAR, 12, 25)),
+    ("Dec.25", False, datetime.date(THIS_YEAR, 12, 25)),
+    ("Jan 5", False, datetime.date(THIS_YEAR, 1, 5)),
+    ("１２２５", False, datetime.date(THIS_YEAR, 12, 25)),
+    ("0230", False, None),
+    ("0000", False, None),
+    ("99999999", False, None),
+    ("2023/2/29", False, None),
+    ("", False, None),
+    ("-", False, None),
+    ("x1", False, None),
+    ("abc", False, None),
+    ("TODO", False, None),
+    ("noon", False, None),
+    ("today", False, None),
+    ("明天", False, None),
+    ("一些", False, None),
+])
+def test_validate_matches_previous_results(text, check_over, expected):
+    assert validate(text, date_overwrite=OVERWRITE, check_over=check_over) == expected
+
+
+def test_parse_tasks():
+    structured = parse_tasks([
+        "SetDate 20240105",
+        "無空白任務",
+        "@alice",
+        "20240110 寫報告",
+        "mo. 開會",
+        "一 讀書",
+        "一些事 要做",
+        "",
+        "專案時程",
+        "20240120 交付",
+    ])
+    assert structured["task_assignment"][np.inf][np.inf] == ["無空白任務"]
+    alice = structured["task_assignment"]["alice"]
+    assert alice["2024/01/10"] == ["寫報告"]
+    assert alice["2024/01/08"] == ["開會", "讀書"]
+    assert alice[np.inf] == ["一些事 要做"]
+    assert structured["schedule"]["專案時程"]["2024/01/20"] == ["交付"]
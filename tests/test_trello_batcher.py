@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+from trello_client import AsyncTrelloClient
+from trello_client import RateLimited
+from trello_client import ResourceUnavailable
+from trello_client import TrelloBatcher
+from trello_client import Unauthorized
+from trello_handler import TrelloHandler
+
+
+class BatchOnlyClient(AsyncTrelloClient):
+    """Answers ``/batch`` with canned per-route results instead of calling Trello."""
+
+    def __init__(self, results):
+        super().__init__("key", "token", guild_id="1")
+        self.results = results
+        self.batches = []
+
+    async def fetch_json(self, uri_path, http_method="GET", query_params=None, post_args=None, batchable=False):
+        if uri_path != "/batch":
+            return await super().fetch_json(uri_path, http_method, query_params, post_args, batchable)
+        routes = query_params["urls"].split(",")
+        self.batches.append(routes)
+        return [self.results[route.split("?")[0]] for route in routes]
+
+
+@pytest.mark.parametrize("result, status, error", [
+    ({"404": "The requested resource was not found."}, 404, ResourceUnavailable),
+    ({"name": "NotFoundError", "message": "gone", "statusCode": 404}, 404, ResourceUnavailable),
+    ({"message": "gone", "status": "404"}, 404, ResourceUnavailable),
+    ({"name": "NotFoundError", "message": "gone"}, 404, ResourceUnavailable),
+    ({"message": "The requested resource was not found."}, 404, ResourceUnavailable),
+    ("The requested resource was not found.", 404, ResourceUnavailable),
+    ({"401": "unauthorized permission requested"}, 401, Unauthorized),
+    ({"statusCode": 429, "message": "API_TOKEN_LIMIT_EXCEEDED"}, 429, RateLimited),
+    ({"message": "something else"}, 0, ResourceUnavailable),
+    (None, 0, ResourceUnavailable),
+])
+def test_batch_error_shapes(result, status, error):
+    e = TrelloBatcher._batch_error("/cards/c1", result)
+    assert type(e) is error
+    assert e.status == status
+
+
+def test_deleted_card_in_batch_is_reported_missing():
+    async def run():
+        client = BatchOnlyClient({
+            "/cards/alive": {"200": {"id": "alive", "idBoard": "b0"}},
+            "/cards/deleted": {"name": "NotFoundError", "message": "The requested resource was not found."},
+        })
+        handler = TrelloHandler()
+        alive, deleted = await asyncio.gather(
+            handler._fetch_card(client, "alive"), handler._fetch_card(client, "deleted"))
+        assert len(client.batches) == 1
+        assert alive.id == "alive"
+        assert deleted is None
+    asyncio.run(run())
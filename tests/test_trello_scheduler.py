@@ -0,0 +1,67 @@
+import asyncio
+import time
+
+import pytest
+
+from trello_client import RateLimited
+from trello_scheduler import TokenBucket
+from trello_scheduler import TrelloRequestScheduler
+
+
+def test_token_bucket_refills_at_its_rate():
+    bucket = TokenBucket(capacity=2, period=1.0)
+    now = bucket.updated
+    assert bucket.try_take(now) == 0
+    assert bucket.try_take(now) == 0
+    assert bucket.try_take(now) == pytest.approx(0.5)
+    assert bucket.try_take(now + 0.5) == 0
+
+
+def test_guilds_are_served_round_robin():
+    async def run():
+        scheduler = TrelloRequestScheduler(capacity=1, period=0.01)
+        order = []
+
+        def request(guild_id):
+            async def send():
+                order.append(guild_id)
+            return scheduler.run(guild_id, "key", send)
+
+        await asyncio.gather(*[request("busy") for _ in range(6)], *[request("quiet") for _ in range(2)])
+        # The quiet guild is not queued behind the whole batch of the busy one.
+        assert order[:4] == ["busy", "quiet", "busy", "quiet"]
+        assert scheduler.granted == 8
+        assert scheduler.queue_depth() == 0
+    asyncio.run(run())
+
+
+def test_rate_limited_requests_are_retried_after_retry_after():
+    async def run():
+        scheduler = TrelloRequestScheduler(backoff_base=0.001)
+        attempts = []
+
+        async def send():
+            attempts.append(time.monotonic())
+            if len(attempts) == 1:
+                raise RateLimited("slow down", 429, retry_after=0.05)
+            return "ok"
+
+        assert await scheduler.run("1", "key", send) == "ok"
+        assert attempts[1] - attempts[0] >= 0.05
+        assert scheduler.retried == 1
+    asyncio.run(run())
+
+
+def test_rate_limit_is_raised_after_max_retries():
+    async def run():
+        scheduler = TrelloRequestScheduler(max_retries=2, backoff_base=0.001)
+        attempts = []
+
+        async def send():
+            attempts.append(None)
+            raise RateLimited("slow down", 429)
+
+        with pytest.raises(RateLimited):
+            await scheduler.run("1", "key", send)
+        assert len(attempts) == 3
+    asyncio.run(run())
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import time
+
+from types import SimpleNamespace
+
+from aiohttp.test_utils import TestClient
+from aiohttp.test_utils import TestServer
+
+from database_handler import MirroredCard
+from database_handler import TaskOrcDB
+from trello_client import AsyncTrelloClient
+from trello_handler import TrelloHandler
+from trello_webhook import TrelloWebhookReceiver
+from trello_webhook import sign_payload
+
+
+class RecordingDB:
+    def __init__(self):
+        self.deleted = []
+
+    async def delete_cards(self, guild_id, card_ids):
+        self.deleted.append((guild_id, card_ids))
+
+
+def _receiver(handler, db):
+    return TrelloWebhookReceiver(handler, db, "https://bot.example.com", "webhook-key", "webhook-secret")
+
+
+def test_signature_covers_body_and_callback_url():
+    receiver = _receiver(TrelloHandler(), RecordingDB())
+    body = b'{"action": {}}'
+    url = receiver.callback_url("1")
+    signature = sign_payload("webhook-secret", body, url)
+    assert receiver.verify(body, url, signature)
+    assert not receiver.verify(body + b" ", url, signature)
+    assert not receiver.verify(body, receiver.callback_url("2"), signature)
+    assert not receiver.verify(body, url, sign_payload("other-secret", body, url))
+    assert not receiver.verify(body, url, None)
+
+
+def test_events_are_checked_per_guild_key():
+    async def run():
+        handler = TrelloHandler()
+        db = RecordingDB()
+        receiver = _receiver(handler, db)
+        await handler._clients.put("1", AsyncTrelloClient("webhook-key", "token", guild_id="1"))
+        await handler._clients.put("2", AsyncTrelloClient("other-key", "token", guild_id="2"))
+        body = json.dumps({"action": {"type": "deleteCard", "data": {"card": {"id": "c1"}}}}).encode()
+
+        async with TestClient(TestServer(receiver.make_app())) as client:
+            async def post(guild_id, secret="webhook-secret"):
+                signature = sign_payload(secret, body, receiver.callback_url(guild_id))
+                response = await client.post(
+                    f"{receiver.path}/{guild_id}", data=body, headers={"X-Trello-Webhook": signature})
+                return response.status
+
+            assert await post("1") == 200
+            assert await post("1", secret="other-secret") == 401
+            assert await post("2") == 410
+        assert db.deleted == [("1", ["c1"])]
+        await handler.close()
+    asyncio.run(run())
+
+
+def test_webhooks_are_registered_in_the_background_for_our_key_only(monkeypatch):
+    async def run():
+        handler = TrelloHandler()
+        receiver = _receiver(handler, RecordingDB())
+        registered = []
+        release = asyncio.Event()
+
+        async def update_board_id_to_name(guild_id):
+            pass
+
+        async def get_board_list_data(trello):
+            await release.wait()
+            return type("BoardListData", (), {"board_id_to_name": {"b0": "Board"}})()
+
+        async def create_hook(self, callback_url, board_id, desc):
+            registered.append((self.guild_id, board_id))
+
+        monkeypatch.setattr(handler, "update_board_id_to_name", update_board_id_to_name)
+        monkeypatch.setattr(handler, "get_board_list_data", get_board_list_data)
+        monkeypatch.setattr(AsyncTrelloClient, "create_hook", create_hook)
+        try:
+            handler.add_client_listener(receiver.register_guild)
+            await handler.add_client("1", "webhook-key", "token")
+            await handler.add_client("2", "other-key", "token")
+            # add_client returned while registration is still waiting on Trello.
+            assert registered == []
+            release.set()
+            await asyncio.gather(*handler._listener_tasks)
+            assert registered == [("1", "b0")]
+        finally:
+            await handler.close()
+    asyncio.run(run())
+
+
+class CardClient(AsyncTrelloClient):
+    def __init__(self, cards):
+        super().__init__("webhook-key", "token", guild_id="1")
+        self.cards = cards
+
+    async def fetch_json(self, uri_path, http_method="GET", query_params=None, post_args=None, batchable=False):
+        return self.cards[uri_path.split("/")[-1]]
+
+
+def _move_events(card_id):
+    return (
+        {"type": "moveCardToBoard", "data": {"board": {"id": "b1"}, "card": {"id": card_id}}},
+        {"type": "moveCardFromBoard", "data": {"board": {"id": "b0"}, "card": {"id": card_id}}})
+
+
+def test_move_events_in_any_order_keep_the_card(in_tmp_path):
+    async def run():
+        db = TaskOrcDB()
+        handler = TrelloHandler()
+        try:
+            await db.setup()
+            receiver = _receiver(handler, db)
+            card = {"id": "c0", "name": "Card", "idBoard": "b1", "idList": "l1", "idMembers": []}
+            await handler._clients.put("1", CardClient({"c0": card}))
+            handler._metadata["1"] = SimpleNamespace(
+                board_activity={"b0": None, "b1": None}, board_list_data=None,
+                checked_at=time.monotonic(), version=0)
+            to_board, from_board = _move_events("c0")
+            # The destination board's event arrives before the source board's.
+            await receiver.apply("1", to_board)
+            await receiver.apply("1", from_board)
+            assert [(c.card_id, c.board_id) for c in await db.get_undone_cards("1")] == [("c0", "b1")]
+        finally:
+            await handler.close()
+            await db.close()
+    asyncio.run(run())
+
+
+def test_move_from_board_without_client_only_deletes_from_that_board(in_tmp_path):
+    async def run():
+        db = TaskOrcDB()
+        try:
+            await db.setup()
+            receiver = _receiver(TrelloHandler(), db)
+            await db.upsert_cards("1", [
+                MirroredCard("c0", "b1", "l1", "Moved", None, False, [], "", []),
+                MirroredCard("c1", "b0", "l0", "Left", None, False, [], "", [])])
+            await receiver.apply("1", _move_events("c0")[1])
+            await receiver.apply("1", _move_events("c1")[1])
+            assert [c.card_id for c in await db.get_undone_cards("1")] == ["c0"]
+        finally:
+            await db.close()
+    asyncio.run(run())
@@ -0,0 +1,449 @@
+import asyncio
+import datetime
+
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+from urllib.parse import urlencode
+
+import aiohttp
+
+API_ROOT = "https://api.trello.com/1"
+
+
+class ResourceUnavailable(Exception):
+    def __init__(self, msg: str, status: int) -> None:
+        super().__init__(f"{msg} (HTTP {status})")
+        self.status = status
+
+class Unauthorized(ResourceUnavailable):
+    pass
+
+class RateLimited(ResourceUnavailable):
+    def __init__(self, msg: str, status: int, retry_after: Optional[float] = None) -> None:
+        super().__init__(msg, status)
+        self.retry_after = retry_after
+
+
+def parse_trello_date(value: Optional[str]) -> Optional[datetime.datetime]:
+    if not value:
+        return None
+    return datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+class Member:
+    def __init__(self, client: "AsyncTrelloClient", member_id: str, full_name: str = "", username: str = ""):
+        self.client = client
+        self.id = member_id
+        self.full_name = full_name
+        self.username = username
+
+    @classmethod
+    def from_json(cls, client: "AsyncTrelloClient", json_obj: Dict[str, Any]) -> "Member":
+        return cls(
+            client,
+            json_obj["id"],
+            full_name=json_obj.get("fullName", ""),
+            username=json_obj.get("username", ""))
+
+
+class Card:
+    def __init__(self, client: "AsyncTrelloClient", card_id: str, name: str = ""):
+        self.client = client
+        self.id = card_id
+        self.name = name
+        self.short_url = None
+        self.board_id = None
+        self.list_id = None
+        self.member_id = []
+        self.due = None
+        self.due_complete = False
+        self.closed = False
+        self.labels = []  # [label name or colour, ]
+
+    @classmethod
+    def from_json(cls, client: "AsyncTrelloClient", json_obj: Dict[str, Any]) -> "Card":
+        card = cls(client, json_obj["id"], name=json_obj.get("name", ""))
+        card.short_url = json_obj.get("shortUrl")
+        card.board_id = json_obj.get("idBoard")
+        card.list_id = json_obj.get("idList")
+        card.member_id = json_obj.get("idMembers", [])
+        card.due = json_obj.get("due")
+        card.due_complete = json_obj.get("dueComplete", False)
+        card.closed = json_obj.get("closed", False)
+        card.labels = [l.get("name") or l.get("color") or "" for l in json_obj.get("labels", [])]
+        return card
+
+    @property
+    def due_date(self) -> Optional[datetime.datetime]:
+        return parse_trello_date(self.due)
+
+    async def get_list(self) -> "TrelloList":
+        json_obj = await self.client.fetch_json(f"/lists/{self.list_id}", batchable=True)
+        return TrelloList.from_json(self.client, json_obj)
+
+
+class TrelloList:
+    def __init__(self, client: "AsyncTrelloClient", list_id: str, name: str = "", board_id: Optional[str] = None):
+        self.client = client
+        self.id = list_id
+        self.name = name
+        self.board_id = board_id
+        self.closed = False
+
+    @classmethod
+    def from_json(cls, client: "AsyncTrelloClient", json_obj: Dict[str, Any]) -> "TrelloList":
+        t_list = cls(client, json_obj["id"], name=json_obj.get("name", ""), board_id=json_obj.get("idBoard"))
+        t_list.closed = json_obj.get("closed", False)
+        return t_list
+
+    async def add_card(
+            self,
+            name: str,
+            desc: Optional[str] = None,
+            labels: Optional[List[Any]] = None,
+            due: str = "null",
+            source: Optional[str] = None,
+            position: Optional[str] = None,
+            assign: Optional[List[Any]] = None) -> Card:
+        post_args = {
+            "name": name,
+            "idList": self.id,
+            "desc": desc,
+            "idLabels": ",".join([label.id for label in labels]) if labels else None,
+            "due": due,
+            "idMembers": ",".join([member.id for member in assign]) if assign else None,
+            "idCardSource": source,
+            "pos": position,
+        }
+        json_obj = await self.client.fetch_json("/cards", http_method="POST", post_args=post_args)
+        return Card.from_json(self.client, json_obj)
+
+
+class Board:
+    def __init__(self, client: "AsyncTrelloClient", board_id: str, name: str = ""):
+        self.client = client
+        self.id = board_id
+        self.name = name
+        self.description = ""
+        self.closed = False
+        self.url = None
+        self.date_last_activity = None
+        # Filled when the board was fetched with nested lists/members.
+        self.preloaded_lists: Optional[List["TrelloList"]] = None
+        self.preloaded_members: Optional[List[Member]] = None
+
+    @classmethod
+    def from_json(cls, client: "AsyncTrelloClient", json_obj: Dict[str, Any]) -> "Board":
+        board = cls(client, json_obj["id"], name=json_obj.get("name", ""))
+        board.description = json_obj.get("desc", "") or ""
+        board.closed = json_obj.get("closed", False)
+        board.url = json_obj.get("url")
+        board.date_last_activity = json_obj.get("dateLastActivity")
+        if "lists" in json_obj:
+            board.preloaded_lists = [TrelloList.from_json(client, obj) for obj in json_obj["lists"]]
+        if "members" in json_obj:
+            board.preloaded_members = [Member.from_json(client, obj) for obj in json_obj["members"]]
+        return board
+
+    async def list_lists(self, list_filter: str = "all") -> List[TrelloList]:
+        if self.preloaded_lists is not None and list_filter == "open":
+            return self.preloaded_lists
+        json_obj = await self.client.fetch_json(
+            f"/boards/{self.id}/lists", query_params={"filter": list_filter}, batchable=True)
+        return [TrelloList.from_json(self.client, obj) for obj in json_obj]
+
+    async def get_list(self, list_id: str) -> TrelloList:
+        json_obj = await self.client.fetch_json(f"/lists/{list_id}", batchable=True)
+        return TrelloList.from_json(self.client, json_obj)
+
+    async def open_cards(self, fields: Optional[str] = None) -> List[Card]:
+        json_obj = await self.client.fetch_json(
+            f"/boards/{self.id}/cards/open", query_params={"fields": fields}, batchable=True)
+        return [Card.from_json(self.client, obj) for obj in json_obj]
+
+    async def fetch_actions(
+            self,
+            since: Optional[str] = None,
+            action_filter: Optional[str] = None,
+            limit: int = 1000,
+            fields: Optional[str] = None,
+            member_creator: bool = True,
+            member: bool = True) -> List[Dict[str, Any]]:
+        """Fetch the board's actions; ``member_creator`` and ``member`` embed the members involved."""
+        query_params = {
+            "since": since,
+            "filter": action_filter,
+            "limit": limit,
+            "fields": fields,
+            "memberCreator": member_creator,
+            "member": member,
+        }
+        return await self.client.fetch_json(
+            f"/boards/{self.id}/actions", query_params=query_params, batchable=True)
+
+    async def all_members(self) -> List[Member]:
+        if self.preloaded_members is not None:
+            return self.preloaded_members
+        json_obj = await self.client.fetch_json(
+            f"/boards/{self.id}/members", query_params={"filter": "all"}, batchable=True)
+        return [Member.from_json(self.client, obj) for obj in json_obj]
+
+
+class TrelloBatcher:
+    """Multiplexes independent GETs into Trello ``/1/batch`` requests.
+
+    GETs issued within ``window`` seconds are collected, up to Trello's
+    limit of 10 routes, and sent as one request. Every caller still awaits
+    its own result, or the error Trello reported for its route.
+    """
+    MAX_URLS = 10
+
+    def __init__(self, client: "AsyncTrelloClient", window: float = 0.01) -> None:
+        self.client = client
+        self.window = window
+        self._pending: List[Tuple[str, Dict[str, Any], asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks = set()
+
+    async def get(self, uri_path: str, query_params: Dict[str, Any]) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((uri_path, query_params, future))
+        if len(self._pending) >= self.MAX_URLS:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch = self._pending[:self.MAX_URLS]
+            self._pending = self._pending[self.MAX_URLS:]
+            task = asyncio.get_running_loop().create_task(self._send(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _send(self, batch: List[Tuple[str, Dict[str, Any], asyncio.Future]]) -> None:
+        if len(batch) == 1:
+            uri_path, query_params, future = batch[0]
+            try:
+                future.set_result(await self.client.fetch_json(uri_path, query_params=query_params))
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        # Commas inside a route are percent-encoded by urlencode, so the
+        # routes can be joined with plain commas.
+        routes = [
+            f"{uri_path}?{urlencode(query_params)}" if query_params else uri_path
+            for uri_path, query_params, _ in batch]
+        try:
+            results = await self.client.fetch_json("/batch", query_params={"urls": ",".join(routes)})
+        except Exception as e:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for route, (_, _, future), result in zip(routes, batch, results):
+            if future.done():
+                continue
+            if isinstance(result, dict) and "200" in result:
+                future.set_result(result["200"])
+            else:
+                future.set_exception(self._batch_error(route, result))
+
+    @staticmethod
+    def _batch_error(route: str, result: Any) -> ResourceUnavailable:
+        """The error a route would have raised on its own, from its failed ``/batch`` result.
+
+        Trello reports a failed route either as ``{"404": "message"}`` or as an
+        error object like ``{"name": ..., "message": ..., "statusCode": 404}``;
+        anything unrecognised that says "not found" is treated as a 404.
+        """
+        status, message = 0, result
+        if isinstance(result, dict):
+            codes = [k for k in result if str(k).isdigit()]
+            if codes:
+                status, message = int(codes[0]), result[codes[0]]
+            else:
+                message = result.get("message") or result.get("error") or result.get("name") or result
+                for field in ("statusCode", "status", "code"):
+                    try:
+                        status = int(result[field])
+                        break
+                    except (KeyError, TypeError, ValueError):
+                        continue
+                if status == 0 and "notfound" in str(result.get("name", "")).lower():
+                    status = 404
+        if status == 0 and "not found" in str(message).lower():
+            status = 404
+        msg = f"{message} at url: {route}"
+        if status == 429:
+            return RateLimited(msg, status)
+        if status == 401:
+            return Unauthorized(msg, status)
+        return ResourceUnavailable(msg, status)
+
+
+class AsyncTrelloClient:
+    """Trello REST client on a pooled keep-alive aiohttp session.
+
+    Mirrors the subset of ``trello.TrelloClient`` the bot uses, with every
+    network call being a coroutine so it never blocks the event loop.
+    """
+
+    def __init__(
+            self,
+            api_key: str,
+            api_secret: str,
+            connection_limit: int = 8,
+            keepalive_timeout: float = 30.0,
+            request_timeout: float = 30.0,
+            scheduler: Optional["TrelloRequestScheduler"] = None,
+            guild_id: Optional[str] = None,
+            batch_window: Optional[float] = 0.01) -> None:
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.scheduler = scheduler
+        self.guild_id = guild_id
+        self.connection_limit = connection_limit
+        self.keepalive_timeout = keepalive_timeout
+        self.request_timeout = request_timeout
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._batcher = TrelloBatcher(self, batch_window) if batch_window is not None else None
+        self.closed = False
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        # An evicted or shut down client must not quietly reconnect.
+        if self.closed:
+            raise RuntimeError(f"Trello client of guild {self.guild_id} is closed")
+        # The session has to be created inside a running event loop.
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.connection_limit,
+                keepalive_timeout=self.keepalive_timeout)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout))
+        return self._session
+
+    async def close(self) -> None:
+        self.closed = True
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def fetch_json(
+            self,
+            uri_path: str,
+            http_method: str = "GET",
+            query_params: Optional[Dict[str, Any]] = None,
+            post_args: Optional[Dict[str, Any]] = None,
+            batchable: bool = False) -> Any:
+        query_params = {
+            k: str(v).lower() if isinstance(v, bool) else v
+            for k, v in (query_params or {}).items() if v is not None}
+        if batchable and http_method == "GET" and self._batcher is not None:
+            return await self._batcher.get(uri_path, query_params)
+
+        params = {"key": self.api_key, "token": self.api_secret, **query_params}
+        data = None
+        if post_args is not None:
+            data = {k: v for k, v in post_args.items() if v is not None}
+
+        url = f"{API_ROOT}{uri_path}"
+
+        async def send() -> Any:
+            async with self._get_session().request(http_method, url, params=params, json=data) as response:
+                if response.status == 429:
+                    retry_after = response.headers.get("Retry-After")
+                    raise RateLimited(
+                        f"{await response.text()} at url: {url}",
+                        response.status,
+                        float(retry_after) if retry_after else None)
+                if response.status == 401:
+                    raise Unauthorized(f"{await response.text()} at url: {url}", response.status)
+                if response.status != 200:
+                    raise ResourceUnavailable(f"{await response.text()} at url: {url}", response.status)
+                return await response.json()
+
+        if self.scheduler is None:
+            return await send()
+        return await self.scheduler.run(self.guild_id, self.api_key, send)
+
+    async def list_boards(
+            self,
+            board_filter: str = "all",
+            fields: Optional[str] = None,
+            lists: Optional[str] = None,
+            members: Optional[str] = None,
+            list_fields: Optional[str] = None,
+            member_fields: Optional[str] = None) -> List[Board]:
+        """List the boards of the token owner.
+
+        ``lists`` and ``members`` are Trello nested-resource filters (e.g.
+        ``"open"`` and ``"all"``) that embed each board's lists and members
+        in the same response; ``list_fields`` and ``member_fields`` project
+        those nested objects.
+        """
+        query_params = {
+            "filter": board_filter,
+            "fields": fields,
+            "lists": lists,
+            "list_fields": list_fields,
+            "members": members,
+            "member_fields": member_fields,
+        }
+        json_obj = await self.fetch_json("/members/me/boards", query_params=query_params)
+        return [Board.from_json(self, obj) for obj in json_obj]
+
+    async def get_board(self, board_id: str) -> Board:
+        json_obj = await self.fetch_json(f"/boards/{board_id}", batchable=True)
+        return Board.from_json(self, json_obj)
+
+    async def create_hook(self, callback_url: str, id_model: str, desc: Optional[str] = None) -> Dict[str, Any]:
+        return await self.fetch_json(
+            "/webhooks",
+            http_method="POST",
+            post_args={"callbackURL": callback_url, "idModel": id_model, "description": desc})
+
+    async def get_card(self, card_id: str, fields: Optional[str] = None) -> Card:
+        json_obj = await self.fetch_json(
+            f"/cards/{card_id}", query_params={"fields": fields}, batchable=True)
+        return Card.from_json(self, json_obj)
+
+    async def search(
+            self,
+            query: str,
+            partial: bool = False,
+            models: List[str] = [],
+            board_ids: List[str] = [],
+            cards_limit: int = 10,
+            cards_page: int = 0,
+            card_fields: Optional[str] = None,
+            board_fields: Optional[str] = None) -> List[Any]:
+        query_params = {
+            "query": query,
+            "partial": partial,
+            "modelTypes": ",".join(models) if models else None,
+            "idBoards": ",".join(board_ids) if board_ids else None,
+            "cards_limit": cards_limit,
+            "cards_page": cards_page or None,
+            "card_fields": card_fields,
+            "board_fields": board_fields,
+        }
+        json_obj = await self.fetch_json("/search", query_params=query_params)
+        results = []
+        for obj in json_obj.get("boards", []):
+            results.append(Board.from_json(self, obj))
+        for obj in json_obj.get("cards", []):
+            results.append(Card.from_json(self, obj))
+        return results
@@ -1,21 +1,36 @@
+import asyncio
 import datetime
 import json
 import math
+import time
 
+from collections import OrderedDict
+from typing import Any
+from typing import AsyncIterator
+from typing import Awaitable
+from typing import Callable
 from typing import Dict
 from typing import List
 from typing import Optional
+from typing import Set
 from typing import Tuple
 from typing import Union
 
 import numpy as np
 
 import ezcord
+from database_handler import MirroredCard
+from database_handler import TaskOrcDB
 from discord import ApplicationContext
-from trello import TrelloClient
-from trello.board import Board
-from trello.card import Card
-from trello.trellolist import List as TrelloList
+from ezcord import log
+from trello_client import AsyncTrelloClient
+from trello_client import Board
+from trello_client import Card
+from trello_client import ResourceUnavailable
+from trello_client import TrelloList
+from trello_client import parse_trello_date
+from state_backend import StateBackend
+from trello_scheduler import TrelloRequestScheduler
 
 class BoardListData:
     def __init__(self):
@@ -41,6 +56,62 @@ class BoardListData:
             "list_id_to_name:\n"\
             f"{json.dumps(self.list_id_to_name, indent=4, ensure_ascii=False)}"
 
+    def set_list(self, board_id: str, list_id: str, list_name: str) -> None:
+        """Add or rename an open list of a board in place."""
+        board_name = self.board_id_to_name.get(board_id)
+        if board_name is None: return
+        self.remove_list(board_id, list_id)
+        self.list_name_to_id[list_name] = list_id
+        self.list_id_to_name[list_id] = list_name
+        self.board_name_to_list_name.setdefault(board_name, []).append(list_name)
+
+    def remove_list(self, board_id: str, list_id: str) -> None:
+        """Drop an archived or moved list of a board in place."""
+        list_name = self.list_id_to_name.pop(list_id, None)
+        if list_name is None: return
+        if self.list_name_to_id.get(list_name) == list_id:
+            del self.list_name_to_id[list_name]
+        list_names = self.board_name_to_list_name.get(self.board_id_to_name.get(board_id), [])
+        if list_name in list_names:
+            list_names.remove(list_name)
+
+    def rename_board(self, board_id: str, board_name: str) -> None:
+        old_name = self.board_id_to_name.get(board_id)
+        if old_name is None or old_name == board_name: return
+        self.board_id_to_name[board_id] = board_name
+        if self.board_name_to_id.get(old_name) == board_id:
+            del self.board_name_to_id[old_name]
+        self.board_name_to_id[board_name] = board_id
+        self.board_name_to_list_name[board_name] = self.board_name_to_list_name.pop(old_name, [])
+
+    @classmethod
+    def from_boards(cls, boards: List[Board]) -> "BoardListData":
+        """Build from boards fetched with their open lists nested."""
+        board_list_data = cls()
+        for board in boards:
+            board_list_data.board_name_to_id[board.name] = board.id
+            board_list_data.board_id_to_name[board.id] = board.name
+            board_list_data.board_name_to_list_name[board.name] = []
+            for l in board.preloaded_lists or []:
+                if l.closed: continue
+                board_list_data.list_name_to_id[l.name] = l.id
+                board_list_data.list_id_to_name[l.id] = l.name
+                board_list_data.board_name_to_list_name[board.name].append(l.name)
+        return board_list_data
+
+class GuildMetadata:
+    """Cached board/list/member structure of one guild's Trello workspace."""
+
+    def __init__(self, boards: List[Board]) -> None:
+        self.board_activity = {b.id: b.date_last_activity for b in boards}  # {board_id: dateLastActivity}
+        self.board_list_data = BoardListData.from_boards(boards)
+        self.member_id_to_name = {}  # {member_id: full_name}
+        for board in boards:
+            for m in board.preloaded_members or []:
+                self.member_id_to_name[m.id] = m.full_name
+        self.checked_at = time.monotonic()
+        self.version = 0  # shared invalidation counter this was loaded at
+
 class TrelloDummyAssign:
     def __init__(self, assignee_id: str):
         self.id = assignee_id
@@ -53,18 +124,19 @@ class DateCard(Card):
             board: Optional[str]=None,
             t_list: Optional[str]=None,
             title: Optional[str]=None,
-            members: Optional[List[str]]=None):
+            members: Optional[List[str]]=None,
+            url: Optional[str]=None):
         if card:
             self._card = card
             self.url = card.short_url
             self.board = card.board_id
-            self.list = card.get_list()
+            self.list = t_list
             self.title = card.name
             self.members = card.member_id
             self._due = card.due_date
         else:
             self._card = None
-            self.url = None
+            self.url = url
             self.board = board
             self.list = t_list
             self.title = title
@@ -89,7 +161,7 @@ no_trello_error_msg = lambda ctx: ezcord.emb.error(
 
 async def get_trello_instance(
         cog_class: ezcord.Cog,
-        ctx: Union[ApplicationContext,int,str]) -> TrelloClient:
+        ctx: Union[ApplicationContext,int,str]) -> AsyncTrelloClient:
     if isinstance(ctx, ApplicationContext):
         gid = ctx.guild_id
     else:
@@ -110,11 +182,13 @@ async def get_trello_instance(
     return
 
 class FilteredCards:
-    def __init__(self):
+    def __init__(self, list_id_to_name: Optional[Dict[str, str]]=None):
         self._c = []
+        self._list_id_to_name = list_id_to_name or {}
 
     def append(self, card: Card) -> None:
-        self._c.append(DateCard(card))
+        # List names come from the prefetched index, never from a request per card.
+        self._c.append(DateCard(card, t_list=self._list_id_to_name.get(card.list_id)))
 
     def plain_append(self, card: DateCard) -> None:
         self._c.append(card)
@@ -152,37 +226,251 @@ class FilteredCards:
         return len(self._c)
 
 
+class ClientRegistry:
+    """Bounded registry of per-guild Trello clients.
+
+    Holds at most ``max_size`` clients, evicting the least recently used
+    one when full and any client idle for longer than ``idle_timeout``
+    seconds. Evicted clients have their HTTP session closed and are rebuilt
+    lazily by ``get_trello_instance`` on the next miss.
+    """
+
+    def __init__(
+            self,
+            max_size: int = 256,
+            idle_timeout: float = 3600.0,
+            on_evict: Optional[Callable[[str], None]] = None) -> None:
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.on_evict = on_evict
+        self._entries = OrderedDict()  # guild_id(str): AsyncTrelloClient, least recently used first
+        self._last_used = {}  # guild_id(str): monotonic time
+        self._closing = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def contains(self, guild_id: str) -> bool:
+        """Probe for a guild's client, counting the lookup as a hit or a miss."""
+        self._evict_idle()
+        if guild_id in self._entries:
+            self.hits += 1
+            self._touch(guild_id)
+            return True
+        self.misses += 1
+        return False
+
+    def get(self, guild_id: str) -> Optional[AsyncTrelloClient]:
+        client = self._entries.get(guild_id)
+        if client is not None:
+            self._touch(guild_id)
+        return client
+
+    async def put(self, guild_id: str, client: AsyncTrelloClient) -> None:
+        old = self._entries.get(guild_id)
+        if old is not None and old is not client:
+            await old.close()
+        self._entries[guild_id] = client
+        self._touch(guild_id)
+        self._evict_idle()
+        while len(self._entries) > self.max_size:
+            self._evict(next(iter(self._entries)))
+
+    async def pop(self, guild_id: str) -> None:
+        client = self._entries.pop(guild_id, None)
+        self._last_used.pop(guild_id, None)
+        if client is not None:
+            await client.close()
+
+    def _touch(self, guild_id: str) -> None:
+        self._entries.move_to_end(guild_id)
+        self._last_used[guild_id] = time.monotonic()
+
+    def _evict_idle(self) -> None:
+        deadline = time.monotonic() - self.idle_timeout
+        # Entries are ordered by last use, so the idle ones are at the front.
+        while self._entries:
+            guild_id = next(iter(self._entries))
+            if self._last_used[guild_id] > deadline:
+                break
+            self._evict(guild_id)
+
+    def _evict(self, guild_id: str) -> None:
+        client = self._entries.pop(guild_id)
+        self._last_used.pop(guild_id, None)
+        self.evictions += 1
+        # Closed right away, so a caller still holding the client can't reopen its session.
+        client.closed = True
+        task = asyncio.get_running_loop().create_task(client.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+        if self.on_evict:
+            self.on_evict(guild_id)
+
+    def stats(self) -> Dict[str, int]:
+        return {"size": len(self._entries), "hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+    async def close(self) -> None:
+        """Close every client, including evicted ones still closing."""
+        clients = list(self._entries.values())
+        self._entries.clear()
+        self._last_used.clear()
+        for client in clients:
+            await client.close()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+
 class TrelloHandler:
+    SEARCH_MAX_PAGES = 100  # Trello caps cards_page at 100
+    # Only the fields DateCard, BoardListData and the member map read.
+    SEARCH_CARD_FIELDS = "name,due,idList,idBoard,idMembers,shortUrl"
+    BOARD_FIELDS = "name,dateLastActivity"
+    BOARD_LIST_FIELDS = "name,closed,idBoard"
+    BOARD_MEMBER_FIELDS = "fullName"
+    BOARD_SUMMARY_FIELDS = "name,desc"
+    MIRROR_CARD_FIELDS = "name,due,dueComplete,idList,idBoard,idMembers,shortUrl,closed,labels"
+    MIRROR_ACTION_FIELDS = "type,date,data"
+    MIRROR_ACTION_LIMIT = 1000
+    MIRROR_CARD_ACTIONS = [
+        "createCard", "updateCard", "deleteCard", "copyCard", "convertToCardFromCheckItem",
+        "moveCardToBoard", "moveCardFromBoard", "addMemberToCard", "removeMemberFromCard",
+        "addLabelToCard", "removeLabelFromCard"]
+    # List changes can affect many cards at once, so the board is reloaded.
+    MIRROR_RELOAD_ACTIONS = ["updateList", "moveListToBoard", "moveListFromBoard"]
 
-    def __init__(self):
-        self._clients = {}  # guild_id(str): TrelloClient
+    def __init__(
+            self,
+            scheduler: Optional[TrelloRequestScheduler] = None,
+            metadata_ttl: float = 300.0,
+            card_concurrency: int = 5,
+            mirror_sync_interval: float = 30.0,
+            max_clients: int = 256,
+            client_idle_timeout: float = 3600.0,
+            state: Optional[StateBackend] = None):
+        self.scheduler = scheduler or TrelloRequestScheduler()
+        # Clients and cached metadata stay per process; a shared backend only
+        # carries invalidations, so one process's config change reaches all.
+        self.state = state
+        self.metadata_ttl = metadata_ttl
+        self.card_concurrency = card_concurrency
+        self.mirror_sync_interval = mirror_sync_interval
+        self._mirror_synced_at = {}  # guild_id(str): monotonic time of the last card mirror sync
+        self._client_listeners = []  # coroutine functions called with the guild_id of each new client
+        self._listener_tasks = set()
+        self._clients = ClientRegistry(max_clients, client_idle_timeout, on_evict=self._forget_guild)
         self._board_id_to_name = {}  # guild_id(str): {board_id(str): board_name}
+        self._metadata = {}  # guild_id(str): GuildMetadata
+        self._in_flight = {}  # (query, guild_id(str), *args): asyncio.Task
 
-    def _parse_input(self, inp: Union[str, int, TrelloClient]) -> TrelloClient:
-        if isinstance(inp, TrelloClient):
+    def _parse_input(self, inp: Union[str, int, AsyncTrelloClient]) -> AsyncTrelloClient:
+        if isinstance(inp, AsyncTrelloClient):
             return inp
         else:
             return self._clients.get(str(inp))
 
     async def add_client(self, guild_id: Union[str, int], key: str, token: str) -> None:
-        self._clients[str(guild_id)] = TrelloClient(
+        await self._clients.put(str(guild_id), AsyncTrelloClient(
             api_key=key,
-            api_secret=token)
+            api_secret=token,
+            scheduler=self.scheduler,
+            guild_id=str(guild_id)))
         await self.update_board_id_to_name(guild_id)
-
-    def remove_client(self, guild_id: Union[str, int]) -> None:
-        if str(guild_id) in self._clients.keys():
-            del self._clients[str(guild_id)]
-        if str(guild_id) in self._board_id_to_name.keys():
-            self._board_id_to_name[str(guild_id)] = {}
+        # Listeners may call Trello for a while, so they run in the background
+        # instead of delaying the command that created the client.
+        for listener in self._client_listeners:
+            task = asyncio.get_running_loop().create_task(listener(str(guild_id)))
+            self._listener_tasks.add(task)
+            task.add_done_callback(self._listener_done)
+
+    async def close(self) -> None:
+        """Stop pending client listeners and close every Trello client."""
+        for task in list(self._listener_tasks):
+            task.cancel()
+        if self._listener_tasks:
+            await asyncio.gather(*self._listener_tasks, return_exceptions=True)
+        await self._clients.close()
+
+    def _listener_done(self, task: asyncio.Task) -> None:
+        self._listener_tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            log.warning(f"Trello client listener failed: {task.exception()!r}")
+
+    def add_client_listener(self, listener: Callable[[str], Awaitable[None]]) -> None:
+        self._client_listeners.append(listener)
+
+    async def remove_client(self, guild_id: Union[str, int]) -> None:
+        await self._clients.pop(str(guild_id))
+        self._forget_guild(str(guild_id))
+
+    def _forget_guild(self, guild_id: str) -> None:
+        self._board_id_to_name.pop(guild_id, None)
+        self._mirror_synced_at.pop(guild_id, None)
+        self._metadata.pop(guild_id, None)
+
+    async def invalidate_metadata(self, guild_id: Union[str, int]) -> None:
+        """Drop the cached board/list structure, in every process, so the next read refetches it."""
+        self._metadata.pop(str(guild_id), None)
+        if self.state is not None:
+            await self.state.incr(f"trello_metadata_version:{guild_id}")
+
+    async def _metadata_version(self, guild_id: str) -> int:
+        if self.state is None: return 0
+        return int(await self.state.get(f"trello_metadata_version:{guild_id}") or 0)
+
+    def get_cached_board_list_data(self, guild_id: Union[str, int]) -> Optional[BoardListData]:
+        """Return the cached BoardListData without touching Trello, for in-place patches."""
+        metadata = self._metadata.get(str(guild_id))
+        return metadata.board_list_data if metadata else None
+
+    async def _single_flight(self, key: Tuple, coro_factory: Callable[[], Awaitable[Any]]) -> Any:
+        """Share one in-flight call among concurrent callers with the same key."""
+        task = self._in_flight.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(coro_factory())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shielded so one cancelled caller does not cancel the others' result.
+        return await asyncio.shield(task)
+
+    async def _get_metadata(self, trello: AsyncTrelloClient) -> GuildMetadata:
+        cached = self._metadata.get(trello.guild_id)
+        if cached and time.monotonic() - cached.checked_at < self.metadata_ttl\
+                and cached.version == await self._metadata_version(trello.guild_id):
+            return cached
+        return await self._single_flight(
+            ("metadata", trello.guild_id), lambda: self._load_metadata(trello, cached))
+
+    async def _load_metadata(self, trello: AsyncTrelloClient, cached: Optional[GuildMetadata]) -> GuildMetadata:
+        gid = trello.guild_id
+        version = await self._metadata_version(gid)
+        if cached and cached.version == version:
+            # One cheap call tells whether any board changed since the last fetch.
+            all_boards = await trello.list_boards(fields=self.BOARD_FIELDS)
+            if {b.id: b.date_last_activity for b in all_boards} == cached.board_activity:
+                cached.checked_at = time.monotonic()
+                return cached
+
+        # Boards, their open lists and their members in a single request.
+        all_boards = await trello.list_boards(
+            fields=self.BOARD_FIELDS,
+            lists="open",
+            list_fields=self.BOARD_LIST_FIELDS,
+            members="all",
+            member_fields=self.BOARD_MEMBER_FIELDS)
+        metadata = GuildMetadata(all_boards)
+        metadata.version = version
+        self._metadata[gid] = metadata
+        self._board_id_to_name[gid] = metadata.board_list_data.board_id_to_name
+        return metadata
 
     async def update_board_id_to_name(self, guild_id: Union[str, int]) -> None:
-        trello = self._clients[str(guild_id)]
+        trello = self._clients.get(str(guild_id))
         if trello is None: return
-        self._board_id_to_name[str(guild_id)] = {}
-        all_boards = trello.list_boards()
-        for b in all_boards:
-            self._board_id_to_name[str(guild_id)][b.id] = b.name
+        await self._get_metadata(trello)
 
     async def get_board_names(self, guild_id: Union[str, int]) -> dict:
         await self.update_board_id_to_name(guild_id)
@@ -190,58 +478,208 @@ class TrelloHandler:
         return guild_boards if guild_boards else {}
 
     def contains_guild(self, guild_id: Union[str, int]) -> bool:
-        return str(guild_id) in self._clients.keys()
+        return self._clients.contains(str(guild_id))
 
-    async def get_members(self, inp: Union[str, int, TrelloClient]) -> Dict[str, str]:
+    def client_stats(self) -> Dict[str, int]:
+        return self._clients.stats()
+
+    async def get_members(self, inp: Union[str, int, AsyncTrelloClient]) -> Dict[str, str]:
         trello = self._parse_input(inp)
         if trello is None: return
-
-        all_boards = trello.list_boards()
-        member_id_to_name_dict = {}
-        for board in all_boards:
-            for m in board.all_members():
-                member_id_to_name_dict[m.id] = m.full_name
-        return member_id_to_name_dict
+        metadata = await self._get_metadata(trello)
+        return dict(metadata.member_id_to_name)
 
     async def get_boards(self, guild_id: Union[str, int]) -> List[Board]:
-        return self._clients[str(guild_id)].list_boards()
+        return await self._clients.get(str(guild_id)).list_boards(fields=self.BOARD_SUMMARY_FIELDS)
 
     async def get_undone(
             self,
-            inp: Union[str, int, TrelloClient],
+            inp: Union[str, int, AsyncTrelloClient],
             trello_id: str=None,
             list_name_not_to_trace: List[str] = []) -> Optional[FilteredCards]:
         trello = self._parse_input(inp)
         if trello is None: return
+        key = ("undone", trello.guild_id, trello_id, tuple(sorted(list_name_not_to_trace)))
+        return await self._single_flight(
+            key, lambda: self._get_undone(trello, trello_id, list_name_not_to_trace))
+
+    async def _get_undone(
+            self,
+            trello: AsyncTrelloClient,
+            trello_id: Optional[str],
+            list_name_not_to_trace: List[str]) -> FilteredCards:
         cards = FilteredCards()
+        async for page in self.iter_undone(trello, trello_id, list_name_not_to_trace):
+            for card in page:
+                cards.plain_append(card)
+        return cards
+
+    async def iter_undone(
+            self,
+            inp: Union[str, int, AsyncTrelloClient],
+            trello_id: str=None,
+            list_name_not_to_trace: List[str] = [],
+            page_size: int = 1000) -> AsyncIterator[List[DateCard]]:
+        """Yield undone cards page by page as Trello returns them."""
+        trello = self._parse_input(inp)
+        if trello is None: return
+        board_list_data = await self.get_board_list_data(trello)
         query = "is:open -due:complete sort:due -label:header"
         if trello_id: query += f" member:{trello_id}"
         for name in list_name_not_to_trace:
             query += f" -list:\"{name}\""
-        for card in trello.search(query, models=["cards",], cards_limit=1000):
-            cards.append(card)
+        for page in range(self.SEARCH_MAX_PAGES):
+            results = await trello.search(
+                query,
+                models=["cards",],
+                cards_limit=page_size,
+                cards_page=page,
+                card_fields=self.SEARCH_CARD_FIELDS)
+            if results:
+                yield [DateCard(card, t_list=board_list_data.list_id_to_name.get(card.list_id)) for card in results]
+            if len(results) < page_size:
+                return
+        log.warning(f"Undone card search stopped at Trello's limit of {self.SEARCH_MAX_PAGES} pages.")
+
+    async def get_mirrored_undone(
+            self,
+            inp: Union[str, int, AsyncTrelloClient],
+            db: TaskOrcDB,
+            trello_id: str=None,
+            list_name_not_to_trace: List[str] = []) -> Optional[FilteredCards]:
+        """Answer the undone query from the local card mirror after syncing its deltas."""
+        trello = self._parse_input(inp)
+        if trello is None: return
+        key = ("mirrored_undone", trello.guild_id, trello_id, tuple(sorted(list_name_not_to_trace)))
+        return await self._single_flight(
+            key, lambda: self._get_mirrored_undone(trello, db, trello_id, list_name_not_to_trace))
+
+    async def _get_mirrored_undone(
+            self,
+            trello: AsyncTrelloClient,
+            db: TaskOrcDB,
+            trello_id: Optional[str],
+            list_name_not_to_trace: List[str]) -> FilteredCards:
+        await self.sync_card_mirror(trello, db)
+        list_id_to_name = (await self.get_board_list_data(trello)).list_id_to_name
+        list_ids_not_to_trace = [
+            lid for lid, name in list_id_to_name.items() if name in list_name_not_to_trace]
+        cards = FilteredCards()
+        for card in await db.get_undone_cards(trello.guild_id, trello_id, list_ids_not_to_trace):
+            cards.plain_append(DateCard(
+                due=parse_trello_date(card.due),
+                board=card.board_id,
+                t_list=list_id_to_name.get(card.list_id),
+                title=card.name,
+                members=card.members,
+                url=card.short_url))
         return cards
 
-    async def get_board_list_data(self, guild_id: Union[str, int]) -> BoardListData:
-        board_list_data = BoardListData()
-        trello = self._clients[str(guild_id)]
-        if trello is None: return board_list_data
+    async def sync_card_mirror(self, inp: Union[str, int, AsyncTrelloClient], db: TaskOrcDB) -> None:
+        """Bring the guild's card mirror up to date with Trello.
 
-        all_boards = trello.list_boards()
-        for board in all_boards:
-            board_list_data.board_name_to_id[board.name] = board.id
-            board_list_data.board_id_to_name[board.id] = board.name
-            board_list_data.board_name_to_list_name[board.name] = []
-            for l in board.list_lists():
-                if l.closed: continue
-                board_list_data.list_name_to_id[l.name] = l.id
-                board_list_data.list_id_to_name[l.id] = l.name
-                board_list_data.board_name_to_list_name[board.name].append(l.name)
-        return board_list_data
+        Boards seen for the first time are loaded in full. Afterwards only
+        the board actions since the last sync are read and the cards they
+        touched are refetched.
+        """
+        trello = self._parse_input(inp)
+        if trello is None: return
+        synced_at = self._mirror_synced_at.get(trello.guild_id)
+        if synced_at is not None and time.monotonic() - synced_at < self.mirror_sync_interval:
+            return
+        await self._single_flight(
+            ("sync_card_mirror", trello.guild_id), lambda: self._sync_card_mirror(trello, db))
+
+    async def _sync_card_mirror(self, trello: AsyncTrelloClient, db: TaskOrcDB) -> None:
+        gid = trello.guild_id
+        metadata = await self._get_metadata(trello)
+        state = await db.get_card_sync_state(gid)
+        for board_id in set(state.keys()) - set(metadata.board_activity.keys()):
+            await db.delete_board_cards(gid, board_id)
+        board_ids = set(metadata.board_activity.keys())
+        await asyncio.gather(*[
+            self._sync_board_cards(trello, db, Board(trello, board_id), state.get(board_id), board_ids)
+            for board_id in board_ids])
+        self._mirror_synced_at[gid] = time.monotonic()
+
+    async def _sync_board_cards(
+            self,
+            trello: AsyncTrelloClient,
+            db: TaskOrcDB,
+            board: Board,
+            last_sync: Optional[str],
+            board_ids: Set[str]) -> None:
+        gid = trello.guild_id
+        if last_sync is None:
+            # Leave a margin for clock skew; replaying an action is harmless.
+            started_at = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(minutes=1)
+            cards = await board.open_cards(fields=self.MIRROR_CARD_FIELDS)
+            await db.delete_board_cards(gid, board.id)
+            await db.upsert_cards(gid, [self._to_mirrored_card(c) for c in cards])
+            await db.set_card_sync_state(gid, board.id, started_at.strftime("%Y-%m-%dT%H:%M:%S.000Z"))
+            return
+
+        actions = await board.fetch_actions(
+            since=last_sync,
+            action_filter=",".join(self.MIRROR_CARD_ACTIONS + self.MIRROR_RELOAD_ACTIONS),
+            limit=self.MIRROR_ACTION_LIMIT,
+            fields=self.MIRROR_ACTION_FIELDS,
+            member_creator=False,
+            member=False)
+        if len(actions) >= self.MIRROR_ACTION_LIMIT or\
+                any(a["type"] in self.MIRROR_RELOAD_ACTIONS for a in actions):
+            await self._sync_board_cards(trello, db, board, None, board_ids)
+            return
+        if not actions: return
+
+        card_ids = set(a["data"]["card"]["id"] for a in actions if "card" in a.get("data", {}))
+        fetched = await asyncio.gather(*[self._fetch_card(trello, cid) for cid in card_ids])
+        # A card moved to another mirrored board stays: that board's sync may
+        # already have stored it, and the two syncs run concurrently.
+        alive = [c for c in fetched if c is not None and not c.closed and c.board_id in board_ids]
+        alive_ids = set(c.id for c in alive)
+        await db.upsert_cards(gid, [self._to_mirrored_card(c) for c in alive])
+        await db.delete_cards(gid, [cid for cid in card_ids if cid not in alive_ids])
+        await db.set_card_sync_state(gid, board.id, max(a["date"] for a in actions))
+
+    async def refresh_mirrored_card(
+            self,
+            inp: Union[str, int, AsyncTrelloClient],
+            db: TaskOrcDB,
+            card_id: str) -> None:
+        """Refetch one card into the mirror, or drop it if it is gone, archived or on an unmirrored board."""
+        trello = self._parse_input(inp)
+        if trello is None: return
+        card = await self._fetch_card(trello, card_id)
+        metadata = await self._get_metadata(trello)
+        if card is None or card.closed or card.board_id not in metadata.board_activity:
+            await db.delete_cards(trello.guild_id, [card_id])
+        else:
+            await db.upsert_cards(trello.guild_id, [self._to_mirrored_card(card)])
+
+    async def _fetch_card(self, trello: AsyncTrelloClient, card_id: str) -> Optional[Card]:
+        try:
+            return await trello.get_card(card_id, fields=self.MIRROR_CARD_FIELDS)
+        except ResourceUnavailable as e:
+            if e.status == 404:
+                return None
+            raise
+
+    @staticmethod
+    def _to_mirrored_card(card: Card) -> MirroredCard:
+        return MirroredCard(
+            card.id, card.board_id, card.list_id, card.name, card.due, card.due_complete,
+            [label.lower() for label in card.labels], card.short_url, card.member_id)
+
+    async def get_board_list_data(self, inp: Union[str, int, AsyncTrelloClient]) -> BoardListData:
+        trello = self._parse_input(inp)
+        if trello is None: return BoardListData()
+        metadata = await self._get_metadata(trello)
+        return metadata.board_list_data
 
-    async def add_card(self, trello: TrelloClient, t_list: TrelloList, card: Dict) -> Card:
+    async def add_card(self, trello: AsyncTrelloClient, t_list: TrelloList, card: Dict) -> Card:
         try:
-            return t_list.add_card(
+            return await t_list.add_card(
                 card["name"],
                 desc=None,
                 labels=None,
@@ -250,12 +688,12 @@ class TrelloHandler:
                 position='top',
                 assign=card["assign"])
         except Exception as e:
-            print(e)
+            log.warning(f"Failed to create card '{card['name']}': {e}")
             return None
 
     async def add_cards(
             self,
-            inp: Union[str, int, TrelloClient],
+            inp: Union[str, int, AsyncTrelloClient],
             board_ids: List[str],
             list_ids: List[str],
             names: List[str],
@@ -270,16 +708,20 @@ class TrelloHandler:
             if bid not in request_dict.keys(): request_dict[bid] = {}
             if lid not in request_dict[bid].keys(): request_dict[bid][lid] = []
             request_dict[bid][lid].append({"name": n, "due": due, "assign": assign, "serial": serial})
-        created_cards = {}
+        # Card creation only needs the list id, so the handles are built locally.
+        semaphore = asyncio.Semaphore(self.card_concurrency)
+
+        async def create(t_list: TrelloList, card_dict: Dict) -> Tuple[int, Optional[Card]]:
+            async with semaphore:
+                return card_dict["serial"], await self.add_card(trello, t_list, card_dict)
+
+        jobs = []
         for bid, lids in request_dict.items():
-            board = trello.get_board(bid)
             for lid, cards in lids.items():
-                t_list = board.get_list(lid)
-                for card_dict in cards:
-                    created = await self.add_card(trello, t_list, card_dict)
-                    created_cards[card_dict["serial"]] = created
-        return created_cards
+                t_list = TrelloList(trello, lid, board_id=bid)
+                jobs += [create(t_list, card_dict) for card_dict in cards]
+        return dict(await asyncio.gather(*jobs))
 
 
-    def __getitem__(self, guild_id: Union[str, int]) -> TrelloClient:
+    def __getitem__(self, guild_id: Union[str, int]) -> AsyncTrelloClient:
         return self._clients.get(str(guild_id))
\ No newline at end of file
@@ -0,0 +1,181 @@
+import asyncio
+import random
+import time
+
+from collections import OrderedDict
+from collections import deque
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Deque
+from typing import Dict
+from typing import Optional
+from typing import Union
+
+from trello_client import RateLimited
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at ``capacity / period`` tokens per second."""
+
+    def __init__(self, capacity: int, period: float) -> None:
+        self.capacity = capacity
+        self.rate = capacity / period
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self, now: float) -> float:
+        """Take a token and return 0, or return the seconds until one is available."""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+        self._refill(now)
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def block(self, delay: float) -> None:
+        now = time.monotonic()
+        self.blocked_until = max(self.blocked_until, now + delay)
+        self.tokens = 0.0
+        self.updated = now
+
+
+class _Waiter:
+    __slots__ = ("future", "api_key", "enqueued_at")
+
+    def __init__(self, future: asyncio.Future, api_key: str) -> None:
+        self.future = future
+        self.api_key = api_key
+        self.enqueued_at = time.monotonic()
+
+
+class TrelloRequestScheduler:
+    """Paces all Trello traffic through one token bucket per API key.
+
+    Waiting requests are queued per guild and granted round-robin, so one
+    guild posting a large batch of tasks cannot starve the others sharing
+    the process. Requests answered with HTTP 429 are retried with
+    exponential backoff, honouring ``Retry-After`` when Trello sends it.
+    """
+
+    def __init__(
+            self,
+            capacity: int = 100,
+            period: float = 10.0,
+            max_retries: int = 5,
+            backoff_base: float = 1.0,
+            backoff_max: float = 30.0) -> None:
+        self.capacity = capacity
+        self.period = period
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._waiters: "OrderedDict[str, Deque[_Waiter]]" = OrderedDict()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+        self.granted = 0
+        self.retried = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _bucket(self, api_key: str) -> TokenBucket:
+        if api_key not in self._buckets:
+            self._buckets[api_key] = TokenBucket(self.capacity, self.period)
+        return self._buckets[api_key]
+
+    def _ensure_dispatcher(self) -> None:
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+
+    async def acquire(self, guild_id: Union[str, int], api_key: str) -> None:
+        """Wait for this guild's turn and a free token of its API key."""
+        self._ensure_dispatcher()
+        waiter = _Waiter(asyncio.get_running_loop().create_future(), api_key)
+        self._waiters.setdefault(str(guild_id), deque()).append(waiter)
+        self._wakeup.set()
+        await waiter.future
+
+    async def run(
+            self,
+            guild_id: Union[str, int],
+            api_key: str,
+            send: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``send`` once a token is granted, retrying it on rate limits."""
+        attempt = 0
+        while True:
+            await self.acquire(guild_id, api_key)
+            try:
+                return await send()
+            except RateLimited as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                delay = delay * (0.5 + random.random() / 2)
+                if e.retry_after is not None:
+                    delay = max(delay, e.retry_after)
+                self._bucket(api_key).block(delay)
+                self.retried += 1
+                attempt += 1
+
+    async def _dispatch(self) -> None:
+        while True:
+            self._wakeup.clear()
+            next_wait = None
+            granted = False
+            now = time.monotonic()
+            for guild_id in list(self._waiters.keys()):
+                queue = self._waiters[guild_id]
+                while queue and queue[0].future.done():
+                    queue.popleft()
+                if not queue:
+                    del self._waiters[guild_id]
+                    continue
+                waiter = queue[0]
+                delay = self._bucket(waiter.api_key).try_take(now)
+                if delay > 0:
+                    next_wait = delay if next_wait is None else min(next_wait, delay)
+                    continue
+                queue.popleft()
+                waiter.future.set_result(None)
+                wait = now - waiter.enqueued_at
+                self.granted += 1
+                self.total_wait += wait
+                self.max_wait = max(self.max_wait, wait)
+                # Served guilds go to the back of the rotation.
+                if queue:
+                    self._waiters.move_to_end(guild_id)
+                else:
+                    del self._waiters[guild_id]
+                granted = True
+                break
+            if granted:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=next_wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def queue_depth(self, guild_id: Optional[Union[str, int]] = None) -> int:
+        if guild_id is not None:
+            return len(self._waiters.get(str(guild_id), ()))
+        return sum(len(q) for q in self._waiters.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue_depth(),
+            "queue_depth_per_guild": {gid: len(q) for gid, q in self._waiters.items()},
+            "granted": self.granted,
+            "retried": self.retried,
+            "avg_wait": self.total_wait / self.granted if self.granted else 0.0,
+            "max_wait": self.max_wait,
+        }
@@ -0,0 +1,197 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import os
+
+from typing import Any
+from typing import Dict
+from typing import Optional
+
+import aiohttp
+
+from aiohttp import web
+from ezcord import log
+
+from database_handler import TaskOrcDB
+from trello_client import ResourceUnavailable
+from trello_handler import TrelloHandler
+
+CARD_ACTIONS = set(TrelloHandler.MIRROR_CARD_ACTIONS)
+LIST_ACTIONS = {"createList", "updateList", "moveListToBoard", "moveListFromBoard"}
+BOARD_ACTIONS = {"updateBoard"}
+
+
+def sign_payload(secret: str, body: bytes, callback_url: str) -> str:
+    """Compute the ``X-Trello-Webhook`` signature Trello sends with each event."""
+    digest = hmac.new(secret.encode(), body + callback_url.encode(), hashlib.sha1).digest()
+    return base64.b64encode(digest).decode()
+
+
+class TrelloWebhookReceiver:
+    """Optional aiohttp endpoint receiving Trello webhooks for every board.
+
+    Each event patches the cached BoardListData, board names and mirrored
+    cards of its guild instead of forcing a full refresh. Events are signed
+    with the secret of the Trello key that registered their webhook, so
+    webhooks are only registered for guilds using ``api_key``, the key whose
+    ``secret`` is known here.
+    """
+
+    def __init__(
+            self,
+            trello: TrelloHandler,
+            db: TaskOrcDB,
+            callback_base_url: str,
+            api_key: str,
+            secret: str,
+            host: str = "0.0.0.0",
+            port: int = 8080,
+            path: str = "/trello/webhook") -> None:
+        self.trello = trello
+        self.db = db
+        self.callback_base_url = callback_base_url.rstrip("/")
+        self.api_key = api_key
+        self.secret = secret
+        self.host = host
+        self.port = port
+        self.path = path
+        self._runner: Optional[web.AppRunner] = None
+        self._registered = set()  # {(guild_id, board_id), }
+
+    @classmethod
+    def from_env(cls, trello: TrelloHandler, db: TaskOrcDB) -> Optional["TrelloWebhookReceiver"]:
+        """Build a receiver if ``TRELLO_WEBHOOK_URL``, ``TRELLO_WEBHOOK_KEY`` and ``TRELLO_WEBHOOK_SECRET`` are set.
+
+        ``TRELLO_WEBHOOK_SECRET`` is the application secret of the Trello key
+        ``TRELLO_WEBHOOK_KEY``; guilds configured with another key keep
+        working without webhooks.
+        """
+        url = os.environ.get("TRELLO_WEBHOOK_URL")
+        api_key = os.environ.get("TRELLO_WEBHOOK_KEY")
+        secret = os.environ.get("TRELLO_WEBHOOK_SECRET")
+        if not url or not api_key or not secret:
+            return None
+        return cls(trello, db, url, api_key, secret, port=int(os.environ.get("TRELLO_WEBHOOK_PORT", 8080)))
+
+    def callback_url(self, guild_id: str) -> str:
+        return f"{self.callback_base_url}{self.path}/{guild_id}"
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        # Trello checks the callback URL with a HEAD request before creating a webhook.
+        app.router.add_route("HEAD", f"{self.path}/{{guild_id}}", self._handle_head)
+        app.router.add_post(f"{self.path}/{{guild_id}}", self._handle_post)
+        return app
+
+    async def start(self) -> None:
+        if self._runner is not None: return
+        self._runner = web.AppRunner(self.make_app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self.trello.add_client_listener(self.register_guild)
+        log.info(f"Trello webhook receiver listening on {self.host}:{self.port}{self.path}")
+
+    async def stop(self) -> None:
+        if self._runner is None: return
+        await self._runner.cleanup()
+        self._runner = None
+
+    async def register_guild(self, guild_id: str) -> None:
+        """Register a webhook on every board of the guild's workspace, if the guild uses our key."""
+        trello = self.trello[guild_id]
+        if trello is None: return
+        if trello.api_key != self.api_key:
+            # Trello would sign its events with a secret we don't have.
+            log.info(f"Guild {guild_id} uses another Trello key; not registering webhooks")
+            return
+        board_list_data = await self.trello.get_board_list_data(trello)
+        for board_id in board_list_data.board_id_to_name.keys():
+            if (guild_id, board_id) in self._registered: continue
+            try:
+                await trello.create_hook(self.callback_url(guild_id), board_id, "Task Orc")
+            except ResourceUnavailable as e:
+                # Trello answers 400 when the same webhook already exists.
+                if e.status != 400:
+                    log.warning(f"Failed to register Trello webhook for board {board_id}: {e}")
+                    continue
+            self._registered.add((guild_id, board_id))
+
+    def verify(self, body: bytes, callback_url: str, signature: Optional[str]) -> bool:
+        if not signature:
+            return False
+        return hmac.compare_digest(sign_payload(self.secret, body, callback_url), signature)
+
+    async def _handle_head(self, request: web.Request) -> web.Response:
+        return web.Response()
+
+    async def _handle_post(self, request: web.Request) -> web.Response:
+        guild_id = request.match_info["guild_id"]
+        body = await request.read()
+        if not self.verify(body, self.callback_url(guild_id), request.headers.get("X-Trello-Webhook")):
+            return web.Response(status=401)
+        trello = self.trello[guild_id]
+        if trello is not None and trello.api_key != self.api_key:
+            # The guild switched to another key; 410 tells Trello to delete the webhook.
+            return web.Response(status=410)
+        try:
+            action = json.loads(body)["action"]
+        except (ValueError, KeyError):
+            return web.Response(status=400)
+        await self.apply(guild_id, action)
+        return web.Response()
+
+    async def apply(self, guild_id: str, action: Dict[str, Any]) -> None:
+        """Patch the guild's caches with one Trello action."""
+        action_type = action.get("type")
+        data = action.get("data", {})
+        board_id = data.get("board", {}).get("id")
+
+        if action_type in CARD_ACTIONS and "card" in data:
+            card_id = data["card"]["id"]
+            if action_type == "deleteCard":
+                await self.db.delete_cards(guild_id, [card_id])
+            elif self.trello.contains_guild(guild_id):
+                # Also for moveCardFromBoard: the card may now be on another mirrored board,
+                # whose moveCardToBoard event can arrive first on its own webhook.
+                await self.trello.refresh_mirrored_card(guild_id, self.db, card_id)
+            elif action_type == "moveCardFromBoard":
+                await self.db.delete_cards(guild_id, [card_id], board_id=board_id)
+            return
+
+        board_list_data = self.trello.get_cached_board_list_data(guild_id)
+        if action_type in LIST_ACTIONS and "list" in data:
+            t_list = data["list"]
+            if action_type == "moveListFromBoard" or t_list.get("closed"):
+                if board_list_data: board_list_data.remove_list(board_id, t_list["id"])
+                # The list's cards left with it; the board is reloaded on the next sync.
+                await self.db.delete_board_cards(guild_id, board_id)
+            elif board_list_data and t_list.get("name"):
+                board_list_data.set_list(board_id, t_list["id"], t_list["name"])
+            return
+
+        if action_type in BOARD_ACTIONS:
+            if data.get("board", {}).get("closed"):
+                await self.trello.invalidate_metadata(guild_id)
+            elif board_list_data and data.get("board", {}).get("name"):
+                board_list_data.rename_board(board_id, data["board"]["name"])
+
+
+async def send_fake_webhook(url: str, secret: str, action: Dict[str, Any]) -> int:
+    """Post a signed action to a receiver, the way Trello would."""
+    body = json.dumps({"action": action}).encode()
+    headers = {"X-Trello-Webhook": sign_payload(secret, body, url), "Content-Type": "application/json"}
+    async with aiohttp.ClientSession() as session:
+        async with session.post(url, data=body, headers=headers) as response:
+            return response.status
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Send a fake Trello webhook event to a local receiver.")
+    parser.add_argument("url", help="Callback URL, e.g. http://localhost:8080/trello/webhook/<guild_id>")
+    parser.add_argument("secret", help="Secret the receiver verifies signatures with")
+    parser.add_argument("action", help="Trello action as JSON, e.g. '{\"type\": \"updateBoard\", \"data\": {...}}'")
+    args = parser.parse_args()
+    print(asyncio.run(send_fake_webhook(args.url, args.secret, json.loads(args.action))))
@@ -1,9 +1,11 @@
 import datetime
 import json
+import re
 import numpy as np
 
 from collections import defaultdict
 from dateutil.parser import parse
+from dateutil.parser import parserinfo
 from dateutil.relativedelta import relativedelta
 
 weekday_definition = {
@@ -11,6 +13,15 @@ weekday_definition = {
     "mo.": 0, "tu.": 1, "we.": 2, "th.": 3,"fr.": 4, "sa.": 5, "su.": 6
 }
 
+_ascii_digits = re.compile(r"[0-9]+")
+_has_digit = re.compile(r"\d")
+_alpha_run = re.compile(r"[^\W\d_]+")
+_decimal_text = re.compile(r"\d*")
+# Words dateutil understands on their own; a token without digits needs one of these to be a date.
+_info = parserinfo()
+_dateutil_words = set().union(
+    _info._jump, _info._weekdays, _info._months, _info._hms, _info._ampm, _info._pertain, _info._utczone)
+
 def weekday_to_date(weekday, date_overwrite=None):
     assert isinstance(weekday, int) and 0 <= weekday <= 6
     curr = date_overwrite or datetime.datetime.now().date()
@@ -19,38 +30,57 @@ def weekday_to_date(weekday, date_overwrite=None):
     weekdaydelta = weekday if weekday >= 0 else weekday + 7
     return curr + relativedelta(days= weekdaydelta)
 
+def _parse_compact_date(date_text):
+    """Build a date from ASCII 0MDD/MMDD/YYMMDD/YYYYMMDD without dateutil, or return None."""
+    if not _ascii_digits.fullmatch(date_text):
+        return None
+    if len(date_text) == 3:  # 0MDD
+        year, month, day = None, date_text[:1], date_text[1:]
+    elif len(date_text) == 4:  # MMDD
+        year, month, day = None, date_text[:2], date_text[2:]
+    elif len(date_text) == 6:  # YYMMDD
+        year, month, day = f"20{date_text[:2]}", date_text[2:4], date_text[4:]
+    elif len(date_text) == 8:  # YYYYMMDD
+        year, month, day = date_text[:4], date_text[4:6], date_text[6:]
+    else:
+        return None
+    try:
+        return datetime.date(int(year) if year else datetime.datetime.now().year, int(month), int(day))
+    except ValueError:
+        return None
+
+def _could_be_date(date_text):
+    if _has_digit.search(date_text):
+        return True
+    return any(w.lower() in _dateutil_words for w in _alpha_run.findall(date_text))
+
 def validate(date_text, date_overwrite=None, check_over=True):
 
     date = None
-    all_digits = False
     date_text = str(date_text)
-    try:
-        if all([isinstance(int(d), int) for d in date_text]):
-            all_digits = True
-    except ValueError:
-        pass
 
-    if all_digits:
-        date_text = str(date_text)
-        if len(date_text) == 3:  # handle format 0MDD
-            date_text = f"0{date_text[:1]}/{date_text[1:]}"
-        elif len(date_text) == 4:  # handle format MMDD
-            date_text = f"{date_text[:2]}/{date_text[2:]}"
-        elif len(date_text) == 6:  # handle format YYMMDD
-            date_text = f"20{date_text[:2]}/{date_text[2:4]}/{date_text[4:]}"
-        elif len(date_text) == 8:  # handle format YYYYMMDD
-            date_text = f"{date_text[:4]}/{date_text[4:6]}/{date_text[6:]}"
+    if _decimal_text.fullmatch(date_text):
+        date = _parse_compact_date(date_text)
+        if date is None:
+            # Same reformatting as before for dateutil, e.g. "1305" -> "13/05"
+            if len(date_text) == 3:  # handle format 0MDD
+                date_text = f"0{date_text[:1]}/{date_text[1:]}"
+            elif len(date_text) == 4:  # handle format MMDD
+                date_text = f"{date_text[:2]}/{date_text[2:]}"
+            elif len(date_text) == 6:  # handle format YYMMDD
+                date_text = f"20{date_text[:2]}/{date_text[2:4]}/{date_text[4:]}"
+            elif len(date_text) == 8:  # handle format YYYYMMDD
+                date_text = f"{date_text[:4]}/{date_text[4:6]}/{date_text[6:]}"
 
-    try:
-        date = parse(date_text)
-    except ValueError:
-        pass
+    if date is None and _could_be_date(date_text):
+        try:
+            date = parse(date_text).date()
+        except (ValueError, OverflowError):
+            pass
 
     if date is None:
         return None
 
-    date = date.date()
-
     target_datetime = date_overwrite or datetime.datetime.now().date()
 
     if date < target_datetime and check_over:
@@ -70,7 +100,9 @@ def parse_tasks(msgs):
         if msg.startswith("SetDate"):
             date_overwrite = validate(msg.split(" ")[1], check_over=False)
             continue
-        elif msg.startswith("@"):  # handle name
+        first, _, rest = msg.partition(" ")
+        wd = weekday_definition.get(first.lower())
+        if msg.startswith("@"):  # handle name
             current_asignee = msg[1:]
             current_schedule = None
             structured["task_assignment"][current_asignee.strip()] = defaultdict(list, {np.inf: []})
@@ -80,14 +112,13 @@ def parse_tasks(msgs):
             current_asignee = None
             structured["schedule"][msg.strip()] = defaultdict(list, {np.inf: []})
             interested_dict = structured["schedule"][msg.strip()]
-        elif msg.lower().startswith(tuple(weekday_definition.keys())):
-            wd = weekday_definition[msg.lower().split(" ")[0]]
+        elif wd is not None:
             d = weekday_to_date(wd, date_overwrite=date_overwrite)
-            interested_dict[d.strftime(format="%Y/%m/%d")].append(" ".join(msg.split(" ")[1:]))
-        elif msg.count(" ") == 0 and len(msg):  # handle date-alike tasks
+            interested_dict[d.strftime(format="%Y/%m/%d")].append(rest)
+        elif first == msg and len(msg):  # handle date-alike tasks
             interested_dict[np.inf].append(msg)
-        elif d:= validate(msg.split(" ")[0], date_overwrite=date_overwrite):  # handle date
-            interested_dict[d.strftime(format="%Y/%m/%d")].append(" ".join(msg.split(" ")[1:]))
+        elif d:= validate(first, date_overwrite=date_overwrite):  # handle date
+            interested_dict[d.strftime(format="%Y/%m/%d")].append(rest)
         elif msg in ["", "\n", None]:  # handle spaces
             pass
         else:
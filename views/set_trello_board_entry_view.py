@@ -152,6 +152,7 @@ class SetTrelloBoardEntryView(View):
             await self.data.set_trello_board_id_list_id_to_create_card(
                 self.ctx.guild_id,
                 self.trello_settings.board_id_list_id_to_create_card)
+            await self.ctx.bot.trello.invalidate_metadata(self.ctx.guild_id)
             self.set_embed()
             if interaction.custom_id.endswith("is_set_button") or\
                     len(self.all_boards_to_be_set) == 0:
@@ -80,6 +80,7 @@ class SetTrelloInterestedListView(View):
             await self.data.set_trello_traced_list_name_not_to_trace(
                 self.ctx.guild_id,
                 self.trello_settings.list_name_not_to_trace)
+            await self.ctx.bot.trello.invalidate_metadata(self.ctx.guild_id)
             self.embed.color=dc.Colour.green()
             if not from_paginator:
                 await interaction.response.edit_message(